@@ -0,0 +1,161 @@
+"""Copies wishlist items into the hash-partitioned table, online.
+
+Run after the ``wishlist_item_partitioned`` revision and before
+``app.cli.cutover_partitions``.
+Writes made meanwhile are mirrored by a trigger, so rows are copied with
+``ON CONFLICT DO NOTHING``: a row already mirrored is never overwritten
+with an older version. Each batch locks its source rows ``FOR SHARE``, so
+a concurrent delete (e.g. by the purge job) either runs before the batch
+reads the row or waits for the copy and then mirrors its deletion; a
+deleted row is never copied back. Interrupted runs resume with
+``--after``.
+
+Usage:
+    python -m app.cli.backfill_partitions [--batch-size 5000]
+        [--delay 0.05] [--after CUSTOMER_ID:ITEM_ID] [--verify]
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logging_config import setup_logger
+from app.models.partitioning import COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# one keyset batch per statement and transaction
+COPY_BATCH = text(
+    f"""
+    WITH batch AS (
+        SELECT {COLUMNS} FROM wishlist_item
+        WHERE (customer_id, id) > (:customer_id, :id)
+        ORDER BY customer_id, id
+        LIMIT :limit
+        FOR SHARE
+    ), copied AS (
+        INSERT INTO wishlist_item_new ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    ), last AS (
+        SELECT customer_id, id FROM batch
+        ORDER BY customer_id DESC, id DESC
+        LIMIT 1
+    )
+    SELECT
+        (SELECT count(*) FROM batch) AS read,
+        (SELECT count(*) FROM copied) AS copied,
+        last.customer_id,
+        last.id
+    FROM (SELECT 1) AS one LEFT JOIN last ON true
+    """
+)
+
+
+async def backfill(
+    batch_size: int = 5000, delay: float = 0.05, after=None
+) -> dict:
+    """Copies every row of ``wishlist_item`` in ``(customer_id, id)``
+    order.
+
+    Args:
+        batch_size: Rows per transaction.
+        delay: Seconds slept between batches.
+        after: ``(customer_id, id)`` to resume after.
+
+    Returns:
+        dict: Rows read and copied, elapsed seconds and throughput.
+    """
+    customer_id, item_id = after or (uuid.UUID(int=0), uuid.UUID(int=0))
+    stats = {'read': 0, 'copied': 0}
+    started = time.perf_counter()
+
+    while True:
+        async with engine.begin() as conn:
+            row = (
+                await conn.execute(
+                    COPY_BATCH,
+                    {
+                        'customer_id': customer_id,
+                        'id': item_id,
+                        'limit': batch_size,
+                    },
+                )
+            ).one()
+        # rows deleted while the batch waited for their lock are left out,
+        # so only an empty batch marks the end
+        if not row.read:
+            break
+        stats['read'] += row.read
+        stats['copied'] += row.copied
+
+        customer_id, item_id = row.customer_id, row.id
+        logger.info(
+            'Backfill progress',
+            extra={**stats, 'after': f'{customer_id}:{item_id}'},
+        )
+        await asyncio.sleep(delay)
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    stats['per_second'] = round(stats['read'] / max(stats['seconds'], 1e-6))
+    return stats
+
+
+async def verify() -> bool:
+    """Compares row counts of both tables (a full scan of each)."""
+    async with engine.connect() as conn:
+        old = await conn.scalar(text('SELECT count(*) FROM wishlist_item'))
+        new = await conn.scalar(
+            text('SELECT count(*) FROM wishlist_item_new')
+        )
+    logger.info('Backfill verification', extra={'old': old, 'new': new})
+    return old == new
+
+
+def parse_after(value: str):
+    customer_id, item_id = value.split(':')
+    return uuid.UUID(customer_id), uuid.UUID(item_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=5000,
+        help='rows per transaction',
+    )
+    parser.add_argument(
+        '--delay',
+        type=float,
+        default=0.05,
+        help='seconds between batches',
+    )
+    parser.add_argument(
+        '--after',
+        type=parse_after,
+        help='resume after this CUSTOMER_ID:ITEM_ID (logged as "after")',
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='compare row counts at the end',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    try:
+        stats = await backfill(args.batch_size, args.delay, args.after)
+        logger.info('Backfill finished', extra=stats)
+        if args.verify and not await verify():
+            raise SystemExit('Row counts differ')
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+"""Swaps the hash-partitioned wishlist table in as ``wishlist_item``.
+
+An explicit operator step, kept out of ``alembic upgrade head`` (which
+every container runs on start): run it once
+``python -m app.cli.backfill_partitions --verify`` succeeds. The swap
+happens in one short transaction. The previous table is kept as
+``wishlist_item_unpartitioned`` and a trigger mirrors writes back into
+it, so ``--revert`` loses no data; drop it once the new layout is
+trusted.
+
+Usage:
+    python -m app.cli.cutover_partitions [--revert]
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.core.database import engine
+from app.core.logging_config import setup_logger
+from app.models.partitioning import INDEXES
+
+logger = logging.getLogger(__name__)
+
+# fail fast rather than queue every request behind the exclusive lock
+LOCK_TIMEOUT = "SET LOCAL lock_timeout = '5s'"
+LOCK = 'LOCK TABLE wishlist_item, {other} IN ACCESS EXCLUSIVE MODE'
+
+# refuses a cutover to a table that was never backfilled
+CHECK_BACKFILL = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM wishlist_item)
+        AND NOT EXISTS (SELECT 1 FROM wishlist_item_new) THEN
+        RAISE EXCEPTION 'wishlist_item_new is empty, run the backfill first';
+    END IF;
+END $$
+"""
+
+RENAME_PARTITIONS = """
+DO $$
+DECLARE
+    part regclass;
+BEGIN
+    FOR part IN
+        SELECT inhrelid::regclass FROM pg_inherits
+        WHERE inhparent = '{table}'::regclass
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %s RENAME TO %I',
+            part,
+            replace(part::text, '{old}', '{new}')
+        );
+    END LOOP;
+END $$
+"""
+
+MIRROR_TRIGGER = (
+    'CREATE TRIGGER wishlist_item_mirror '
+    'AFTER INSERT OR UPDATE OR DELETE ON wishlist_item '
+    'FOR EACH ROW EXECUTE FUNCTION '
+    "wishlist_item_mirror('{table}', '{key}')"
+)
+
+
+def swap(current: str, retired: str, incoming: str, suffix: str) -> list:
+    """Returns the statements renaming ``current`` to ``retired`` and
+    ``incoming`` to ``current``, with their primary keys and indexes."""
+    statements = [
+        f'DROP TRIGGER IF EXISTS wishlist_item_mirror ON {current}',
+        f'ALTER TABLE {current} RENAME TO {retired}',
+        f'ALTER TABLE {retired} RENAME CONSTRAINT {current}_pkey '
+        f'TO {retired}_pkey',
+    ]
+    statements += [
+        f'ALTER INDEX IF EXISTS {name} RENAME TO {name}{suffix}'
+        for name, *_ in INDEXES
+    ]
+    statements += [
+        f'ALTER TABLE {incoming} RENAME TO {current}',
+        f'ALTER TABLE {current} RENAME CONSTRAINT {incoming}_pkey '
+        f'TO {current}_pkey',
+    ]
+    incoming_suffix = incoming.removeprefix(current)
+    statements += [
+        f'ALTER INDEX IF EXISTS {name}{incoming_suffix} RENAME TO {name}'
+        for name, *_ in INDEXES
+    ]
+    return statements
+
+
+def cutover_statements(revert: bool = False) -> list[str]:
+    """Returns the statements of the cutover, or of its reversal.
+
+    Args:
+        revert: Whether to swap ``wishlist_item_unpartitioned`` back in.
+
+    Returns:
+        list[str]: SQL statements, to run in order in one transaction.
+    """
+    if revert:
+        return [
+            LOCK_TIMEOUT,
+            LOCK.format(other='wishlist_item_unpartitioned'),
+            RENAME_PARTITIONS.format(
+                table='wishlist_item',
+                old='wishlist_item',
+                new='wishlist_item_new',
+            ),
+            *swap(
+                'wishlist_item',
+                'wishlist_item_new',
+                'wishlist_item_unpartitioned',
+                '_new',
+            ),
+            MIRROR_TRIGGER.format(
+                table='wishlist_item_new', key='customer_id, id'
+            ),
+        ]
+    return [
+        LOCK_TIMEOUT,
+        LOCK.format(other='wishlist_item_new'),
+        CHECK_BACKFILL,
+        *swap(
+            'wishlist_item',
+            'wishlist_item_unpartitioned',
+            'wishlist_item_new',
+            '_unpartitioned',
+        ),
+        RENAME_PARTITIONS.format(
+            table='wishlist_item', old='wishlist_item_new', new='wishlist_item'
+        ),
+        MIRROR_TRIGGER.format(table='wishlist_item_unpartitioned', key='id'),
+    ]
+
+
+async def cutover(revert: bool = False):
+    """Runs the cutover, or its reversal, in one transaction.
+
+    Args:
+        revert: Whether to swap ``wishlist_item_unpartitioned`` back in.
+    """
+    async with engine.begin() as conn:
+        for statement in cutover_statements(revert):
+            await conn.exec_driver_sql(statement)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--revert',
+        action='store_true',
+        help='swap the unpartitioned table back in',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    try:
+        await cutover(args.revert)
+        logger.info('Cutover done', extra={'revert': args.revert})
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
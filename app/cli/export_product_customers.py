@@ -0,0 +1,56 @@
+"""Exports the customers that have a product in their wishlist.
+
+Usage:
+    python -m app.cli.export_product_customers PRODUCT_ID customers.jsonl
+        [--format jsonl|csv] [--chunk-size 5000]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+from app.core.config import settings
+from app.core.logging_config import setup_logger
+from app.services.wishlist_service import WishlistService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('product_id')
+    parser.add_argument('output', help='file to write')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=settings.WISHLIST_EXPORT_CHUNK_SIZE,
+        help='rows fetched per round trip',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    exported = 0
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if args.format == 'csv':
+            writer.writerow(['customer_id', 'email'])
+
+        async for chunk in WishlistService.customers_with_product(
+            args.product_id, args.chunk_size
+        ):
+            for customer_id, email in chunk:
+                if args.format == 'csv':
+                    writer.writerow([customer_id, email])
+                else:
+                    record = {'customer_id': str(customer_id), 'email': email}
+                    f.write(json.dumps(record) + '\n')
+            exported += len(chunk)
+    logger.info(
+        'Customers exported',
+        extra={'product_id': args.product_id, 'customers': exported},
+    )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""Loads a product catalog snapshot into the product cache.
+
+Usage:
+    python -m app.cli.load_catalog catalog.jsonl [--chunk-size 1000]
+        [--overwrite]
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.core.logging_config import setup_logger
+from app.core.redis import close_redis, init_redis
+from app.services.catalog_loader import load_catalog
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='JSONL (.jsonl/.ndjson) or CSV file')
+    parser.add_argument(
+        '--chunk-size', type=int, default=settings.PRODUCT_CATALOG_CHUNK_SIZE
+    )
+    parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        help='replace existing cache records',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    await init_redis()
+    try:
+        await load_catalog(
+            args.path, chunk_size=args.chunk_size, overwrite=args.overwrite
+        )
+    finally:
+        await close_redis()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
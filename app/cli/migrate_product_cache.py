@@ -0,0 +1,111 @@
+"""Migrates product cache entries from the product:{id}:short/long layout
+to single product:{id} records.
+
+Usage:
+    python -m app.cli.migrate_product_cache [--batch-size 500] [--delete]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from app.core.config import settings
+from app.core.logging_config import setup_logger
+from app.core.redis import batch, close_redis, get_redis
+from app.services.product_cache import (
+    encode_record,
+    legacy_keys,
+    record_from_legacy,
+    record_key,
+)
+from app.services.product_service import LONG_TTL, SHORT_TTL, jittered
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(batch_size: int = 500, delete: bool = False) -> int:
+    """Converts every legacy product entry found with SCAN.
+
+    Records already present in the new layout are kept (SET NX), so the
+    migration can run while the application serves traffic and can be
+    re-run safely.
+
+    Args:
+        batch_size: Number of products converted per pipeline.
+        delete: Whether to delete the legacy keys after conversion.
+
+    Returns:
+        int: Number of records written.
+    """
+    client = get_redis()
+    written = 0
+    pending = set()
+
+    async def flush():
+        nonlocal written
+        pids = sorted(pending)
+        pending.clear()
+
+        keys = [key for pid in pids for key in legacy_keys(pid)]
+        values = await client.mget(keys)
+        now = time.time()
+
+        async with batch() as pipe:
+            for i, pid in enumerate(pids):
+                record = record_from_legacy(
+                    values[2 * i],
+                    values[2 * i + 1],
+                    now,
+                    fresh_for=jittered(SHORT_TTL),
+                    tombstone_for=settings.PRODUCT_NOT_FOUND_TTL,
+                )
+                if record is None:
+                    continue
+                ttl = (
+                    settings.PRODUCT_NOT_FOUND_TTL
+                    if record.is_tombstone
+                    else jittered(LONG_TTL)
+                )
+                pipe.set(
+                    record_key(pid), encode_record(record), ex=ttl, nx=True
+                )
+            if delete:
+                pipe.delete(*keys)
+
+        # SET NX replies True when written; DEL replies an integer
+        written += sum(1 for reply in pipe.results if reply is True)
+
+    async for key in client.scan_iter(match='product:*:long', count=1000):
+        pending.add(key.decode().split(':')[1])
+        if len(pending) >= batch_size:
+            await flush()
+            logger.info('Migrated product cache', extra={'written': written})
+
+    async for key in client.scan_iter(match='product:*:short', count=1000):
+        pending.add(key.decode().split(':')[1])
+        if len(pending) >= batch_size:
+            await flush()
+
+    if pending:
+        await flush()
+
+    return written
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument(
+        '--delete', action='store_true', help='delete legacy keys'
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    try:
+        written = await migrate(args.batch_size, args.delete)
+    finally:
+        await close_redis()
+    logger.info('Product cache migration finished', extra={'written': written})
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
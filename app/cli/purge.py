@@ -0,0 +1,57 @@
+"""Cascades customer soft-deletes and purges expired soft-deleted rows.
+
+Usage:
+    python -m app.cli.purge [--retention-days 30] [--batch-size 1000]
+        [--delay 0.1] [--delete]
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.core.logging_config import setup_logger
+from app.core.redis import close_redis, init_redis
+from app.services.purge_service import PurgeService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--retention-days', type=int, default=settings.PURGE_RETENTION_DAYS
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=settings.PURGE_BATCH_SIZE,
+        help='rows per transaction',
+    )
+    parser.add_argument(
+        '--delay',
+        type=float,
+        default=settings.PURGE_BATCH_DELAY,
+        help='seconds between batches',
+    )
+    parser.add_argument(
+        '--delete',
+        action='store_true',
+        help='delete rows instead of moving them to the archive tables',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    await init_redis()
+    try:
+        stats = await PurgeService.purge(
+            args.retention_days,
+            args.batch_size,
+            args.delay,
+            archive=settings.PURGE_ARCHIVE and not args.delete,
+        )
+        logger.info('Purge done', extra=stats)
+    finally:
+        await close_redis()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""Rebuilds the wishlist popularity counters from the wishlist table.
+
+Usage:
+    python -m app.cli.rebuild_popularity [--chunk-size 1000]
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.core.logging_config import setup_logger
+from app.core.redis import close_redis, init_redis
+from app.services.wishlist_popularity import WishlistPopularity
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=settings.WISHLIST_POPULARITY_CHUNK_SIZE,
+        help='customers counted per statement',
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    await init_redis()
+    try:
+        await WishlistPopularity.rebuild(args.chunk_size)
+    finally:
+        await close_redis()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
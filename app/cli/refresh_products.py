@@ -0,0 +1,40 @@
+"""Refreshes hot product cache entries outside of the API process.
+
+Usage:
+    python -m app.cli.refresh_products [--once]
+"""
+import argparse
+import asyncio
+import logging
+from app.core.config import settings
+from app.core.http_client import close_http_client, init_http_client
+from app.core.logging_config import setup_logger
+from app.core.redis import close_redis, init_redis
+from app.services.product_refresher import ProductRefresher
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--once', action='store_true', help='run a single refresh cycle'
+    )
+    args = parser.parse_args()
+
+    setup_logger(settings.LOGLEVE)
+    await init_http_client()
+    await init_redis()
+    try:
+        if args.once:
+            refreshed = await ProductRefresher.refresh_once()
+            logger.info('Hot products refreshed', extra={'refreshed': refreshed})
+        else:
+            await ProductRefresher.run()
+    finally:
+        await close_http_client()
+        await close_redis()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
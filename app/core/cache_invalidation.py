@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+import uuid
+from app.core.redis import create_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+# identifies this process so it can ignore its own messages
+WORKER_ID = uuid.uuid4().hex
+
+_caches = {}
+
+
+def register_cache(namespace: str, cache):
+    """Registers an in-process cache to be invalidated by namespace.
+
+    Args:
+        namespace: Namespace used in invalidation messages.
+        cache: A MemoryCache instance.
+    """
+    _caches[namespace] = cache
+
+
+def invalidation_message(namespace: str, keys) -> str:
+    """Builds the pub/sub payload that drops ``keys`` on other workers.
+
+    Args:
+        namespace: Registered cache namespace.
+        keys: Keys to invalidate.
+
+    Returns:
+        str: JSON message, suitable for ``PUBLISH`` in a pipeline.
+    """
+    return json.dumps(
+        {'origin': WORKER_ID, 'ns': namespace, 'keys': [str(k) for k in keys]}
+    )
+
+
+async def publish_invalidation(namespace: str, keys):
+    """Publishes an invalidation message to every worker.
+
+    Args:
+        namespace: Registered cache namespace.
+        keys: Keys to invalidate.
+    """
+    await get_redis().publish(
+        INVALIDATION_CHANNEL, invalidation_message(namespace, keys)
+    )
+
+
+def handle_invalidation(raw):
+    """Applies an invalidation message published by another worker."""
+    message = json.loads(raw)
+    if message.get('origin') == WORKER_ID:
+        return
+
+    cache = _caches.get(message.get('ns'))
+    if cache is None:
+        return
+
+    for key in message.get('keys', []):
+        cache.delete(key)
+
+
+async def listen_invalidations(retry_delay: float = 1.0):
+    """Subscribes to the invalidation channel until cancelled.
+
+    Messages may be lost while disconnected, so every registered cache is
+    cleared after a reconnect. The subscription holds its connection for
+    good, so it uses a dedicated client without a read timeout instead of
+    the shared pool; polling lets the health check detect dead sockets.
+    """
+    while True:
+        client = create_redis(socket_timeout=None)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                for cache in _caches.values():
+                    cache.clear()
+
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        handle_invalidation(message['data'])
+
+        except Exception:
+            logger.exception('Cache invalidation listener failed')
+            await asyncio.sleep(retry_delay)
+        finally:
+            await client.aclose()
+            await client.connection_pool.disconnect()
@@ -0,0 +1,225 @@
+import logging
+import time
+from collections import deque
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """The circuit is open and calls are being short-circuited."""
+
+
+class CircuitBreaker:
+    """Circuit breaker with failure-rate and slow-call thresholds.
+
+    Outcomes of the last ``window_size`` calls are kept in a sliding
+    window. Once ``minimum_calls`` are recorded, the circuit opens when the
+    failure rate or the slow-call rate reaches its threshold. After
+    ``cooldown`` seconds it becomes half-open and lets
+    ``half_open_max_calls`` probes through; they close the circuit if all
+    succeed, otherwise it opens again.
+
+    With ``shared=True`` an opening is also written to Redis so that other
+    workers open their circuit until the same deadline.
+
+    Usage::
+
+        async with breaker.guard():
+            await call_upstream()
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 0.5,
+        slow_call_duration: float = 2.0,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        cooldown: float = 30.0,
+        half_open_max_calls: int = 3,
+        shared: bool = False,
+        sync_interval: float = 1.0,
+        is_failure=None,
+    ):
+        """
+        Args:
+            name: Circuit name, used in logs and the shared Redis key.
+            failure_rate_threshold: Failure ratio that opens the circuit.
+            slow_call_rate_threshold: Slow call ratio that opens the
+                circuit.
+            slow_call_duration: Seconds after which a call counts as slow.
+            window_size: Number of recent calls considered.
+            minimum_calls: Calls required before rates are evaluated.
+            cooldown: Seconds the circuit stays open.
+            half_open_max_calls: Probes allowed while half-open.
+            shared: Whether to share openings through Redis.
+            sync_interval: Minimum seconds between shared state reads.
+            is_failure: Optional callable deciding whether an exception
+                counts as a failure; by default every exception does.
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.minimum_calls = minimum_calls
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.is_failure = is_failure or (lambda exc: True)
+
+        self.state = self.CLOSED
+        self._window = deque(maxlen=window_size)
+        self._opened_until = 0.0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        self._last_sync = 0.0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def shared_key(self) -> str:
+        return f'circuit:{self.name}:open_until'
+
+    def available(self) -> bool:
+        """Returns whether a call would currently be let through, without
+        reserving a half-open probe."""
+        if self.state == self.OPEN:
+            return time.monotonic() >= self._opened_until
+        if self.state == self.HALF_OPEN:
+            return self._half_open_calls < self.half_open_max_calls
+        return True
+
+    def guard(self):
+        """Returns an async context manager protecting one call."""
+        return _CircuitCall(self)
+
+    async def _before_call(self):
+        await self._sync_shared()
+
+        if self.state == self.OPEN:
+            if time.monotonic() < self._opened_until:
+                self.rejected += 1
+                raise CircuitOpenError(self.name)
+            self._transition(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name)
+            self._half_open_calls += 1
+
+    async def _after_call(self, duration: float, exc):
+        failed = exc is not None and self.is_failure(exc)
+        slow = duration >= self.slow_call_duration
+
+        if self.state == self.HALF_OPEN:
+            if failed or slow:
+                await self._open()
+            else:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(self.CLOSED)
+            return
+
+        if self.state == self.OPEN:
+            # another call opened the circuit meanwhile
+            return
+
+        self._window.append((failed, slow))
+        if len(self._window) >= self.minimum_calls:
+            calls = len(self._window)
+            failures = sum(1 for f, _ in self._window if f)
+            slow_calls = sum(1 for _, s in self._window if s)
+            if (
+                failures / calls >= self.failure_rate_threshold
+                or slow_calls / calls >= self.slow_call_rate_threshold
+            ):
+                await self._open()
+
+    def stats(self) -> dict:
+        """Returns the circuit state and counters."""
+        calls = len(self._window)
+        return {
+            'name': self.name,
+            'state': self.state,
+            'shared': self.shared,
+            'calls': calls,
+            'failure_rate': (
+                sum(1 for f, _ in self._window if f) / calls if calls else 0.0
+            ),
+            'slow_call_rate': (
+                sum(1 for _, s in self._window if s) / calls if calls else 0.0
+            ),
+            'open_for': max(0.0, self._opened_until - time.monotonic()),
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
+
+    async def _open(self, until: float | None = None, publish: bool = True):
+        self._opened_until = until or time.monotonic() + self.cooldown
+        self.opened += 1
+        self._transition(self.OPEN)
+
+        if self.shared and publish:
+            remaining_ms = int((self._opened_until - time.monotonic()) * 1000)
+            try:
+                await get_redis().set(
+                    self.shared_key,
+                    int(time.time() * 1000) + remaining_ms,
+                    px=max(1, remaining_ms),
+                )
+            except Exception:
+                logger.warning('Could not share circuit state %s', self.name)
+
+    async def _sync_shared(self):
+        """Opens the local circuit if another worker opened it."""
+        now = time.monotonic()
+        if not self.shared or now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        try:
+            value = await get_redis().get(self.shared_key)
+        except Exception:
+            return
+
+        if value is None or self.state == self.OPEN:
+            return
+
+        remaining = (int(value) - time.time() * 1000) / 1000
+        if remaining > 0:
+            await self._open(until=now + remaining, publish=False)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning('Circuit %s: %s -> %s', self.name, self.state, state)
+        self.state = state
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        if state == self.CLOSED:
+            self._window.clear()
+
+
+class _CircuitCall:
+    """Context manager measuring a single call through a breaker."""
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.started = 0.0
+
+    async def __aenter__(self):
+        await self.breaker._before_call()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.breaker._after_call(time.monotonic() - self.started, exc)
+        return False
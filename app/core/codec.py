@@ -0,0 +1,102 @@
+"""Binary serialization for cache values.
+
+Encoded values start with a format byte identifying the codec; the high bit
+marks zlib compression. Values starting with ``{`` or ``[`` are plain JSON
+written before the format byte existed and are still decoded.
+"""
+import json
+import logging
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED = 0x80
+
+_codecs = {}
+_formats = {}
+
+
+def register_codec(name: str, fmt: int, dumps, loads):
+    """Registers a codec.
+
+    Args:
+        name: Codec name used in settings.
+        fmt: Format byte (1-127) written in front of encoded values.
+        dumps: Callable turning an object into bytes.
+        loads: Callable turning bytes into an object.
+    """
+    _codecs[name] = (fmt, dumps)
+    _formats[fmt] = loads
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+register_codec('json', 0x01, _json_dumps, json.loads)
+
+if msgpack is not None:
+    register_codec(
+        'msgpack',
+        0x02,
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda raw: msgpack.unpackb(raw, raw=False),
+    )
+
+
+def resolve_codec(name: str) -> str:
+    """Returns ``name`` if registered, otherwise falls back to JSON."""
+    if name in _codecs:
+        return name
+    logger.warning('Codec %s unavailable, falling back to json', name)
+    return 'json'
+
+
+def encode(obj, codec: str = 'json', compress_min_bytes: int = 0) -> bytes:
+    """Encodes an object with a format byte.
+
+    Args:
+        obj: Value to encode.
+        codec: Registered codec name.
+        compress_min_bytes: Compress with zlib when the encoded value is at
+            least this long; 0 disables compression.
+
+    Returns:
+        bytes: Format byte followed by the encoded value.
+    """
+    fmt, dumps = _codecs[codec]
+    body = dumps(obj)
+    if compress_min_bytes and len(body) >= compress_min_bytes:
+        compressed = zlib.compress(body)
+        if len(compressed) < len(body):
+            return bytes([fmt | COMPRESSED]) + compressed
+    return bytes([fmt]) + body
+
+
+def decode(raw: bytes):
+    """Decodes a value written by ``encode`` or legacy plain JSON.
+
+    Raises:
+        ValueError: If the format byte is unknown, e.g. msgpack values read
+            by a worker without msgpack installed, or the value is corrupt.
+    """
+    if raw[:1] in (b'{', b'['):
+        return json.loads(raw)
+
+    fmt = raw[0]
+    loads = _formats.get(fmt & ~COMPRESSED)
+    if loads is None:
+        raise ValueError(f'Unknown cache value format {fmt:#x}')
+
+    body = raw[1:]
+    if fmt & COMPRESSED:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise ValueError(f'Corrupt compressed cache value: {e}') from e
+    return loads(body)
@@ -11,8 +11,88 @@ class Settings(BaseSettings):
     JWKS_URI: str = ''
     REDIS_HOST: str = ''
     REDIS_PORT: int = 0
+    REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 1.0
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_RETRIES: int = 2
+    REDIS_RETRY_BACKOFF_BASE: float = 0.01
+    REDIS_RETRY_BACKOFF_CAP: float = 0.2
+    REDIS_NO_RETRY_MAX_CONNECTIONS: int = 10
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
     LOGLEVE: str = 'INFO'
 
+    PRODUCT_API_CONCURRENCY: int = 10
+    PRODUCT_API_CONNECT_TIMEOUT: float = 1.0
+    PRODUCT_API_READ_TIMEOUT: float = 3.0
+    PRODUCT_API_MAX_CONNECTIONS: int = 100
+    PRODUCT_API_MAX_KEEPALIVE: int = 20
+    PRODUCT_API_KEEPALIVE_EXPIRY: float = 30.0
+    PRODUCT_API_HTTP2: bool = False
+
+    PRODUCT_MEMORY_MAX_ENTRIES: int = 10000
+    PRODUCT_MEMORY_MAX_BYTES: int = 16 * 1024 * 1024
+    PRODUCT_MEMORY_TTL: float = 30.0
+
+    PRODUCT_LEASE_TTL_MS: int = 5000
+    PRODUCT_LEASE_WAIT_MS: int = 1000
+    PRODUCT_LEASE_POLL_MS: int = 50
+
+    PRODUCT_STALE_WHILE_REVALIDATE: bool = True
+    PRODUCT_TTL_JITTER: float = 0.1
+    PRODUCT_XFETCH_BETA: float = 1.0
+    PRODUCT_NOT_FOUND_TTL: int = 60
+    PRODUCT_CACHE_LEGACY_READ: bool = True
+    PRODUCT_CACHE_CODEC: str = 'json'
+    PRODUCT_CACHE_COMPRESS_MIN_BYTES: int = 512
+
+    PRODUCT_CIRCUIT_FAILURE_RATE: float = 0.5
+    PRODUCT_CIRCUIT_SLOW_CALL_RATE: float = 0.5
+    PRODUCT_CIRCUIT_SLOW_CALL_DURATION: float = 2.0
+    PRODUCT_CIRCUIT_WINDOW_SIZE: int = 20
+    PRODUCT_CIRCUIT_MINIMUM_CALLS: int = 10
+    PRODUCT_CIRCUIT_COOLDOWN: float = 30.0
+    PRODUCT_CIRCUIT_HALF_OPEN_CALLS: int = 3
+    PRODUCT_CIRCUIT_SHARED: bool = False
+
+    PRODUCT_CATALOG_FILE: str = ''
+    PRODUCT_CATALOG_CHUNK_SIZE: int = 1000
+
+    WISHLIST_CACHE_ENABLED: bool = True
+    WISHLIST_CACHE_TTL: int = 86400
+    WISHLIST_CACHE_MAX_ITEMS: int = 10000
+    WISHLIST_CACHE_REPAIR_ATTEMPTS: int = 6
+    WISHLIST_CACHE_REPAIR_DELAY: float = 0.5
+    WISHLIST_POPULARITY_ENABLED: bool = True
+    WISHLIST_POPULARITY_CHUNK_SIZE: int = 1000
+    WISHLIST_EXPORT_CHUNK_SIZE: int = 5000
+    WISHLIST_PARTITIONS: int = 16
+
+    CUSTOMER_IDENTITY_CACHE_ENABLED: bool = True
+    CUSTOMER_IDENTITY_TTL: int = 300
+    CUSTOMER_IDENTITY_MEMORY_MAX_ENTRIES: int = 10000
+    CUSTOMER_IDENTITY_MEMORY_TTL: float = 30.0
+
+    PRODUCT_REFRESH_ENABLED: bool = True
+    PRODUCT_REFRESH_INTERVAL: float = 60.0
+    PRODUCT_REFRESH_HOT_LIMIT: int = 1000
+    PRODUCT_REFRESH_AHEAD: float = 60.0
+    PRODUCT_REFRESH_BATCH_SIZE: int = 50
+    PRODUCT_REFRESH_BATCH_DELAY: float = 0.5
+    # access counters feed the hot product set; disable when no refresher
+    # runs, neither in process nor through ``app.cli.refresh_products``
+    PRODUCT_ACCESS_TRACKING_ENABLED: bool = True
+    PRODUCT_ACCESS_MAX_KEYS: int = 10000
+    PRODUCT_ACCESS_FLUSH_INTERVAL: float = 60.0
+
+    PURGE_ENABLED: bool = False
+    PURGE_INTERVAL: float = 3600.0
+    PURGE_RETENTION_DAYS: int = 30
+    PURGE_ARCHIVE: bool = True
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_BATCH_DELAY: float = 0.1
+
     class Config:
         env_file = '.env'
         env_file_encoding = 'utf-8'
@@ -0,0 +1,39 @@
+import hashlib
+
+
+def make_etag(*parts) -> str:
+    """Builds a weak entity tag from the values a representation depends on.
+
+    Args:
+        *parts: Values identifying the representation (versions, query
+            parameters...).
+
+    Returns:
+        str: Quoted weak ETag.
+    """
+    digest = hashlib.sha1(
+        '\x1f'.join(str(part) for part in parts).encode()
+    ).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header with an ETag.
+
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or
+            ``*``.
+        etag: Current ETag of the representation.
+
+    Returns:
+        bool: Whether the client copy is still current.
+    """
+    if not if_none_match:
+        return False
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith('W/') else tag
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or opaque(etag) in {opaque(tag) for tag in tags}
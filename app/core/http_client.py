@@ -0,0 +1,70 @@
+import importlib.util
+import logging
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+
+
+def create_http_client(transport=None) -> httpx.AsyncClient:
+    """Creates a pooled HTTP client for the product API.
+
+    Args:
+        transport: Optional httpx transport, e.g. ``httpx.MockTransport``
+            in tests.
+
+    Returns:
+        httpx.AsyncClient: Client configured from settings.
+    """
+    http2 = settings.PRODUCT_API_HTTP2
+    if http2 and importlib.util.find_spec('h2') is None:
+        logger.warning('h2 package not installed, falling back to HTTP/1.1')
+        http2 = False
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            settings.PRODUCT_API_READ_TIMEOUT,
+            connect=settings.PRODUCT_API_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.PRODUCT_API_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PRODUCT_API_MAX_KEEPALIVE,
+            keepalive_expiry=settings.PRODUCT_API_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        transport=transport,
+    )
+
+
+async def init_http_client(transport=None) -> httpx.AsyncClient:
+    """Creates the application-scoped client, replacing any previous one.
+
+    Args:
+        transport: Optional httpx transport.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    global _client
+    await close_http_client()
+    _client = create_http_client(transport)
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared client, creating it outside of the lifespan
+    (scripts, tests) if needed."""
+    global _client
+    if _client is None:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    """Closes the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL.
+
+    The cache is bounded by number of entries and, optionally, by the sum
+    of the sizes given on ``set``. It is not thread-safe; it is meant to be
+    used from a single event loop.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int = 0):
+        """
+        Args:
+            max_entries: Maximum number of entries; 0 disables the cache.
+            ttl: Default time to live in seconds.
+            max_bytes: Maximum total size of entries; 0 means unbounded.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Returns the cached value or None if absent or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, size: int = 0, ttl: float | None = None):
+        """Stores a value, evicting the least recently used entries.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            size: Approximate size of the value in bytes.
+            ttl: Time to live in seconds, defaults to the cache TTL.
+        """
+        if self.max_entries <= 0:
+            return
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        self._remove(key)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, size, value)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or (
+            self.max_bytes and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key) -> bool:
+        """Removes a key, returning whether it was present."""
+        if self._remove(key):
+            self.invalidations += 1
+            return True
+        return False
+
+    def clear(self):
+        """Removes every entry."""
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """Returns usage counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def _remove(self, key) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
@@ -1,4 +1,174 @@
-from redis.asyncio import Redis
+from contextlib import asynccontextmanager
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
 from app.core.config import settings
 
-redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+_client: Redis | None = None
+
+# for commands that must not be replayed, see ``get_redis``
+_no_retry_client: Redis | None = None
+
+# Lua helper incrementing a version key. A missing key (never written,
+# expired or evicted) restarts from the current time in microseconds
+# rather than from 0, so a version is never reused, e.g. in an ETag.
+BUMP = """
+local function bump(key)
+    if redis.call('EXISTS', key) == 0 then
+        local t = redis.call('TIME')
+        redis.call('SET', key, t[1] .. string.format('%06d', t[2]))
+    end
+    return redis.call('INCR', key)
+end
+"""
+
+
+def create_redis(
+    socket_timeout: float | None = -1,
+    retries: int | None = None,
+    max_connections: int | None = None,
+) -> Redis:
+    """Creates a Redis client with a bounded connection pool.
+
+    Commands that fail with a connection error or a timeout are retried
+    with exponential backoff. Waiting for a free pooled connection is
+    bounded by ``REDIS_POOL_TIMEOUT``.
+
+    Args:
+        socket_timeout: Read timeout in seconds; defaults to
+            ``REDIS_SOCKET_TIMEOUT``. None disables it, e.g. for pub/sub.
+        retries: Retries per command; defaults to ``REDIS_RETRIES``.
+        max_connections: Pool size; defaults to ``REDIS_MAX_CONNECTIONS``.
+
+    Returns:
+        Redis: Client configured from settings.
+    """
+    if socket_timeout == -1:
+        socket_timeout = settings.REDIS_SOCKET_TIMEOUT
+    if retries is None:
+        retries = settings.REDIS_RETRIES
+
+    pool = BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        max_connections=max_connections or settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_timeout=socket_timeout,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        retry=Retry(
+            ExponentialBackoff(
+                cap=settings.REDIS_RETRY_BACKOFF_CAP,
+                base=settings.REDIS_RETRY_BACKOFF_BASE,
+            ),
+            retries,
+        ),
+        retry_on_error=[ConnectionError, TimeoutError],
+    )
+    return Redis(connection_pool=pool)
+
+
+async def init_redis() -> Redis:
+    """Creates the application-scoped client, replacing any previous one.
+
+    Returns:
+        Redis: The shared client.
+    """
+    global _client
+    await close_redis()
+    _client = create_redis()
+    return _client
+
+
+def get_redis(retry: bool = True) -> Redis:
+    """Returns a shared client, creating it outside of the lifespan
+    (scripts, tests) if needed.
+
+    Args:
+        retry: Whether failed commands are retried. A command that timed
+            out may still have run, so commands that are not idempotent
+            (counter increments, scripts applying deltas) use a client
+            without retries, with its own smaller pool.
+    """
+    global _client, _no_retry_client
+    if not retry:
+        if _no_retry_client is None:
+            _no_retry_client = create_redis(
+                retries=0,
+                max_connections=settings.REDIS_NO_RETRY_MAX_CONNECTIONS,
+            )
+        return _no_retry_client
+    if _client is None:
+        _client = create_redis()
+    return _client
+
+
+async def close_redis():
+    """Closes the shared clients and disconnects their pools."""
+    global _client, _no_retry_client
+    for client in (_client, _no_retry_client):
+        if client is not None:
+            await client.aclose()
+            await client.connection_pool.disconnect()
+    _client = None
+    _no_retry_client = None
+
+
+class Batch:
+    """Commands queued on a pipeline; replies are in ``results`` once the
+    ``batch()`` block exits."""
+
+    def __init__(self, pipe):
+        self.pipe = pipe
+        self.results = []
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
+
+
+@asynccontextmanager
+async def batch(transaction: bool = False, retry: bool = True):
+    """Sends every command queued in the block in a single round trip.
+
+    Usage::
+
+        async with batch() as b:
+            b.get('a')
+            b.set('b', 1)
+        value, _ = b.results
+
+    Args:
+        transaction: Whether to wrap the commands in MULTI/EXEC.
+        retry: Whether the batch is retried on failure, see
+            ``get_redis``.
+    """
+    async with get_redis(retry).pipeline(transaction=transaction) as pipe:
+        b = Batch(pipe)
+        yield b
+        if len(pipe):
+            b.results = await pipe.execute()
+
+
+async def bump_version(key: str) -> int:
+    """Increments a version key, see ``BUMP``.
+
+    Returns:
+        int: The new version.
+    """
+    return await get_redis().eval(BUMP + 'return bump(KEYS[1])', 1, key)
+
+
+def pool_stats() -> dict:
+    """Returns usage statistics of the shared connection pool."""
+    pool = get_redis().connection_pool
+    in_use = len(getattr(pool, '_in_use_connections', ()))
+    available = len(getattr(pool, '_available_connections', ()))
+    return {
+        'max_connections': pool.max_connections,
+        'in_use': in_use,
+        'idle': available,
+        'usage': in_use / pool.max_connections,
+    }
@@ -1,8 +1,20 @@
-from app.services.product_service import ProductService
+from app.core.config import settings
+from app.services.catalog_loader import load_catalog, load_products
 
 
 async def create_products_cache():
-    """Create products cache on redis"""
+    """Create products cache on redis
+
+    Loads the catalog snapshot at ``PRODUCT_CATALOG_FILE`` when set,
+    otherwise the sample products below.
+    """
+    if settings.PRODUCT_CATALOG_FILE:
+        await load_catalog(
+            settings.PRODUCT_CATALOG_FILE,
+            chunk_size=settings.PRODUCT_CATALOG_CHUNK_SIZE,
+        )
+        return
+
     products_seed = [
         {
             'price': 129.90,
@@ -166,5 +178,4 @@ async def create_products_cache():
         },
     ]
 
-    for item in products_seed:
-        await ProductService.save_long_cache(item['id'], item)
+    await load_products(products_seed)
@@ -7,17 +7,44 @@ from app.core.auth_validation import require_user, require_role
 
 from app.routers.customer_router import router as customer_router
 from app.routers.wishlist_router import router as wishlist_router
+from app.routers.metrics_router import router as metrics_router
+from app.routers.admin_router import router as admin_router
 from app.core.seeder import create_products_cache
+from app.core.http_client import init_http_client, close_http_client
+from app.core.redis import init_redis, close_redis
+from app.core.cache_invalidation import listen_invalidations
+from app.services.product_refresher import ProductRefresher
+from app.services.purge_service import PurgeService
 from contextlib import asynccontextmanager
 from app.core.logging_config import setup_logger
+import asyncio
 import logging
 
 setup_logger("DEBUG")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # tests may set app.state.http_transport to a local transport
+    app.state.http_client = await init_http_client(
+        getattr(app.state, 'http_transport', None)
+    )
+    app.state.redis = await init_redis()
     await create_products_cache()
+    background = [asyncio.create_task(listen_invalidations())]
+    if settings.PRODUCT_ACCESS_TRACKING_ENABLED:
+        background.append(
+            asyncio.create_task(ProductRefresher.run_access_flusher())
+        )
+    if settings.PRODUCT_REFRESH_ENABLED:
+        background.append(asyncio.create_task(ProductRefresher.run()))
+    if settings.PURGE_ENABLED:
+        background.append(asyncio.create_task(PurgeService.run()))
     yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await close_http_client()
+    await close_redis()
     logging.info("shutdown")
 
 
@@ -63,4 +90,6 @@ app.openapi = custom_openapi
 app.add_middleware(CurrentUserMiddleware)
 app.include_router(customer_router)
 app.include_router(wishlist_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
@@ -1,2 +1,3 @@
 from app.models.customer import Customer
-from app.models.wishlist_item import WishlistItem
\ No newline at end of file
+from app.models.wishlist_item import WishlistItem
+from app.models.archive import CustomerArchive, WishlistItemArchive
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class CustomerArchive(Base):
+    """Purged customers, kept out of the live table and its indexes."""
+
+    __tablename__ = 'customers_archive'
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    name = Column(String, nullable=False)
+    email = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class WishlistItemArchive(Base):
+    """Purged wishlist items; the customer may be archived as well."""
+
+    __tablename__ = 'wishlist_item_archive'
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    customer_id = Column(UUID(as_uuid=True), nullable=False)
+    product_id = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
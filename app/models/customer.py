@@ -28,4 +28,10 @@ class Customer(Base, TimestampMixin, SoftDeleteMixin):
             unique=True,
             postgresql_where=(deleted_at.is_(None)),
         ),
+        # purge of customers past retention
+        Index(
+            'ix_customers_deleted_at',
+            'deleted_at',
+            postgresql_where=(deleted_at.isnot(None)),
+        ),
     )
\ No newline at end of file
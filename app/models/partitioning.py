@@ -0,0 +1,119 @@
+"""DDL of the hash-partitioned ``wishlist_item`` layout.
+
+Shared by the migrations, the backfill and the partitioning benchmark.
+Partitioned tables need the partition key in every unique index, so the
+primary key is ``(customer_id, id)``; ``uq_customer_product_active``
+already leads with it and is enforced per partition. ``WishlistItem``
+keeps mapping ``id`` alone as its identity, which stays unique (uuid4).
+"""
+
+# name, columns, partial index predicate, unique
+INDEXES = [
+    (
+        'uq_customer_product_active',
+        'customer_id, product_id',
+        'deleted_at IS NULL',
+        True,
+    ),
+    (
+        'ix_wishlist_item_customer_created',
+        'customer_id, created_at, id',
+        'deleted_at IS NULL',
+        False,
+    ),
+    (
+        'ix_wishlist_item_product_customer',
+        'product_id, customer_id',
+        'deleted_at IS NULL',
+        False,
+    ),
+    (
+        'ix_wishlist_item_deleted_at',
+        'deleted_at',
+        'deleted_at IS NOT NULL',
+        False,
+    ),
+    ('ix_wishlist_item_customer_id', 'customer_id', None, False),
+]
+
+COLUMNS = 'id, customer_id, product_id, created_at, updated_at, deleted_at'
+
+# mirrors row changes to the table named by the first trigger argument,
+# upserting on the conflict target given by the second one
+MIRROR_FUNCTION = """
+CREATE OR REPLACE FUNCTION wishlist_item_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        EXECUTE format(
+            'DELETE FROM %I WHERE customer_id = $1 AND id = $2',
+            TG_ARGV[0]
+        ) USING OLD.customer_id, OLD.id;
+        RETURN OLD;
+    END IF;
+    EXECUTE format(
+        'INSERT INTO %I (id, customer_id, product_id, created_at, '
+        'updated_at, deleted_at) VALUES (($1).id, ($1).customer_id, '
+        '($1).product_id, ($1).created_at, ($1).updated_at, '
+        '($1).deleted_at) '
+        'ON CONFLICT (%s) DO UPDATE SET product_id = EXCLUDED.product_id, '
+        'created_at = EXCLUDED.created_at, '
+        'updated_at = EXCLUDED.updated_at, '
+        'deleted_at = EXCLUDED.deleted_at',
+        TG_ARGV[0], TG_ARGV[1]
+    ) USING NEW;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_item_table(
+    table: str,
+    partitions: int,
+    index_suffix: str = '',
+    foreign_key: bool = True,
+) -> list[str]:
+    """Returns the statements creating a wishlist item table.
+
+    Args:
+        table: Name of the table.
+        partitions: Number of hash partitions (modulus); 0 creates a plain
+            table with the same columns and indexes, for comparisons.
+        index_suffix: Appended to index names, while the names are still
+            taken by the table being replaced.
+        foreign_key: Whether ``customer_id`` references ``customers``.
+
+    Returns:
+        list[str]: SQL statements, to run in order.
+    """
+    references = (
+        ' REFERENCES customers (id) ON DELETE CASCADE' if foreign_key else ''
+    )
+    primary_key = '(customer_id, id)' if partitions else '(id)'
+    statements = [
+        f"""
+        CREATE TABLE {table} (
+            id uuid NOT NULL,
+            customer_id uuid NOT NULL{references},
+            product_id varchar NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            deleted_at timestamptz,
+            CONSTRAINT {table}_pkey PRIMARY KEY {primary_key}
+        )
+        """
+        + (' PARTITION BY HASH (customer_id)' if partitions else '')
+    ]
+    statements += [
+        f'CREATE TABLE {table}_p{n} PARTITION OF {table} '
+        f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {n})'
+        for n in range(partitions)
+    ]
+    # created on the parent, so every partition gets its own copy
+    for name, columns, where, unique in INDEXES:
+        statements.append(
+            f'CREATE {"UNIQUE " if unique else ""}INDEX {name}{index_suffix} '
+            f'ON {table} ({columns})'
+            + (f' WHERE {where}' if where else '')
+        )
+    return statements
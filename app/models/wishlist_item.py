@@ -34,4 +34,26 @@ class WishlistItem(Base, TimestampMixin, SoftDeleteMixin):
             unique=True,
             postgresql_where=(deleted_at.is_(None)),
         ),
+        # keyset pagination of a customer's active items
+        Index(
+            'ix_wishlist_item_customer_created',
+            'customer_id',
+            'created_at',
+            'id',
+            postgresql_where=(deleted_at.is_(None)),
+        ),
+        # customers holding a product (notifications, exports)
+        Index(
+            'ix_wishlist_item_product_customer',
+            'product_id',
+            'customer_id',
+            postgresql_where=(deleted_at.is_(None)),
+        ),
+        # purge: rows past retention, and the cascade from customers
+        Index(
+            'ix_wishlist_item_deleted_at',
+            'deleted_at',
+            postgresql_where=(deleted_at.isnot(None)),
+        ),
+        Index('ix_wishlist_item_customer_id', 'customer_id'),
     )
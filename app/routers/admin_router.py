@@ -0,0 +1,80 @@
+import json
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from app.core.auth_validation import require_role
+from app.core.config import settings
+from app.schemas.wishlist import ProductPopularity
+from app.services.wishlist_popularity import WishlistPopularity
+from app.services.wishlist_service import NDJSON_MEDIA_TYPE, WishlistService
+
+router = APIRouter(prefix='/v1/admin', tags=['Admin'])
+
+
+@router.get('/popular-products')
+async def popular_products(
+    limit: int = Query(10, ge=1, le=1000),
+    user=Depends(require_role('ADMIN')),
+) -> list[ProductPopularity]:
+    """Returns the most wishlisted products.
+
+    Args:
+        limit: Maximum number of products to return.
+        user: Authenticated user.
+
+    Returns:
+        Product ids with their active wishlist item count, most
+        wishlisted first.
+    """
+    ranked = await WishlistPopularity.top(limit)
+    return [{'product_id': pid, 'count': count} for pid, count in ranked]
+
+
+@router.get('/popular-products/counts')
+async def popularity_counts(
+    product_id: list[str] = Query(...),
+    user=Depends(require_role('ADMIN')),
+) -> list[ProductPopularity]:
+    """Returns how many wishlists hold each given product.
+
+    Args:
+        product_id: Identifiers of the products (repeatable).
+        user: Authenticated user.
+
+    Returns:
+        Active wishlist item count of each product.
+    """
+    counts = await WishlistPopularity.counts(product_id)
+    return [
+        {'product_id': pid, 'count': count} for pid, count in counts.items()
+    ]
+
+
+@router.get('/products/{product_id}/customers')
+async def product_customers(
+    product_id: str = Path(..., description='Product Id'),
+    user=Depends(require_role('ADMIN')),
+) -> StreamingResponse:
+    """Streams the customers that have a product in their wishlist.
+
+    One JSON line per customer (``customer_id`` and ``email``), written
+    chunk by chunk as they are read, e.g. for price-drop or back-in-stock
+    notifications.
+
+    Args:
+        product_id: ID of the product.
+        user: Authenticated user.
+
+    Returns:
+        NDJSON stream of customers, ordered by id.
+    """
+
+    async def lines():
+        async for chunk in WishlistService.customers_with_product(
+            product_id, settings.WISHLIST_EXPORT_CHUNK_SIZE
+        ):
+            yield ''.join(
+                json.dumps({'customer_id': str(cid), 'email': email}) + '\n'
+                for cid, email in chunk
+            )
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
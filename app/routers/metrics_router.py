@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from app.core.auth_validation import require_role
+from app.core.redis import pool_stats
+from app.services.product_service import ProductService
+
+router = APIRouter(prefix='/v1/metrics', tags=['Metrics'])
+
+
+@router.get('/product-cache')
+async def product_cache_metrics(user=Depends(require_role('ADMIN'))):
+    """Returns the product cache counters of this worker.
+
+    Args:
+        user: Authenticated user.
+
+    Returns:
+        Hit, miss and eviction counters per cache layer.
+    """
+    return ProductService.cache_stats()
+
+
+@router.get('/circuit-breaker')
+async def circuit_breaker_metrics(user=Depends(require_role('ADMIN'))):
+    """Returns the product API circuit breaker state of this worker.
+
+    Args:
+        user: Authenticated user.
+
+    Returns:
+        Circuit state, failure and slow-call rates and counters.
+    """
+    return ProductService.circuit_stats()
+
+
+@router.get('/redis')
+async def redis_metrics(user=Depends(require_role('ADMIN'))):
+    """Returns the Redis connection pool usage of this worker.
+
+    Args:
+        user: Authenticated user.
+
+    Returns:
+        Pool size, connections in use and idle connections.
+    """
+    return pool_stats()
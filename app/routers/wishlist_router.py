@@ -1,39 +1,136 @@
-from fastapi import APIRouter, Depends, Query, Path
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from datetime import timezone
+from email.utils import format_datetime
 from app.core.database import get_db
-from app.services.wishlist_service import WishlistService
+from app.core.http_cache import etag_matches
+from app.services.product_service import LONG_TTL, SHORT_TTL
+from app.services.wishlist_service import (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    WishlistService,
+)
 from app.core.auth_validation import require_role
-from app.schemas.wishlist import WishItemList, WishItemCreate, WishItemDelete
+from app.schemas.wishlist import (
+    WishItemBulk,
+    WishItemBulkOut,
+    WishItemCreate,
+    WishItemDelete,
+    WishItemList,
+    WishlistSummary,
+)
 
 router = APIRouter(
     prefix='/v1/customers/{customer_id}/wishlist', tags=['Wishlist']
 )
 
+# clients revalidate every time, but may show their copy while doing so
+# for as long as product data is fresh, or while the API fails for as
+# long as the fallback cache lasts
+LIST_CACHE_CONTROL = (
+    f'private, max-age=0, stale-while-revalidate={SHORT_TTL}, '
+    f'stale-if-error={LONG_TTL}'
+)
+
 
 @router.get('/')
 async def get_wishlist(
+    response: Response,
     customer_id: str,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(
+        None, description='next_cursor of the previous page'
+    ),
+    if_none_match: str | None = Header(None),
+    accept: str | None = Header(None),
     session=Depends(get_db),
     user=Depends(require_role('CUSTOMER', 'ADMIN')),
 ) -> WishItemList:
     """Returns the customer's wishlist.
 
+    Answers 304 Not Modified, before any database or product lookup,
+    when ``If-None-Match`` carries the current ETag. With ``Accept:
+    application/x-ndjson`` the page is streamed instead, one product per
+    line as soon as it resolves, followed by a summary line.
+
     Args:
+        response: Outgoing response, for the caching headers.
         customer_id: ID of the customer.
         limit: Maximum number of items to return.
         offset: Pagination offset.
+        cursor: Keyset cursor; takes precedence over offset.
+        if_none_match: ETag of the client copy.
+        accept: Accepted media types.
         session: Database session.
         user: Authenticated user.
 
     Returns:
         Paginated list of wishlist items.
     """
+    media_type = JSON_MEDIA_TYPE
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        media_type = NDJSON_MEDIA_TYPE
+
+    # computed before reading, so a concurrent write can only make it
+    # older than the body, never newer
+    etag = await WishlistService.list_etag(
+        customer_id, user, limit, offset, cursor, media_type
+    )
+    headers = {'Cache-Control': LIST_CACHE_CONTROL, 'Vary': 'Accept'}
+    if etag:
+        headers['ETag'] = etag
+        if etag_matches(if_none_match, etag):
+            raise HTTPException(304, headers=headers)
+
+    if media_type == NDJSON_MEDIA_TYPE:
+        lines = await WishlistService.stream_items(
+            session, customer_id, user, limit, offset, cursor
+        )
+        return StreamingResponse(
+            lines, media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+
+    response.headers.update(headers)
     return await WishlistService.list_items(
-        session, customer_id, user, limit, offset
+        session, customer_id, user, limit, offset, cursor
     )
 
 
+@router.get('/summary')
+async def get_summary(
+    response: Response,
+    customer_id: str,
+    session=Depends(get_db),
+    user=Depends(require_role('CUSTOMER', 'ADMIN')),
+) -> WishlistSummary:
+    """Returns how many items the wishlist has and when it last changed.
+
+    Args:
+        response: Outgoing response, for the ``Last-Modified`` header.
+        customer_id: ID of the customer.
+        session: Database session.
+        user: Authenticated user.
+
+    Returns:
+        Item count and last change time.
+    """
+    summary = await WishlistService.summary(session, customer_id, user)
+    if summary['last_modified']:
+        response.headers['Last-Modified'] = format_datetime(
+            summary['last_modified'].astimezone(timezone.utc), usegmt=True
+        )
+    return summary
+
+
 @router.post('/')
 async def add_product(
     data: WishItemCreate,
@@ -57,6 +154,29 @@ async def add_product(
     )
 
 
+@router.post('/bulk')
+async def bulk_update(
+    data: WishItemBulk,
+    customer_id: str,
+    session=Depends(get_db),
+    user=Depends(require_role('CUSTOMER', 'ADMIN')),
+) -> WishItemBulkOut:
+    """Adds and removes many products at once.
+
+    Args:
+        data: Product identifiers to add and to remove.
+        customer_id: ID of the customer.
+        session: Database session.
+        user: Authenticated user.
+
+    Returns:
+        Status of each product.
+    """
+    return await WishlistService.bulk_update(
+        session, customer_id, data.add, data.remove, user
+    )
+
+
 @router.delete('/{product_id}')
 async def delete_customer(
     customer_id: str,
@@ -1,5 +1,6 @@
-from typing import Dict, List
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 from typing import TypedDict
 
 
@@ -13,8 +14,10 @@ class Product(TypedDict):
 
 
 class SourceList(TypedDict):
+    from_memory: List[str]
     from_cache_short: List[str]
     from_cache_long: List[str]
+    from_cache_stale: List[str]
     from_api: List[str]
     not_found: List[str]
 
@@ -23,6 +26,7 @@ class Pagination(TypedDict):
     limit: int
     offset: int
     count: int
+    next_cursor: Optional[str]
 
 
 class WishItemList(BaseModel):
@@ -31,6 +35,16 @@ class WishItemList(BaseModel):
     pagination: Pagination
 
 
+class WishlistSummary(BaseModel):
+    count: int
+    last_modified: Optional[datetime]
+
+
+class ProductPopularity(BaseModel):
+    product_id: str
+    count: int
+
+
 class WishItemCreate(BaseModel):
     product_id: str
 
@@ -42,3 +56,24 @@ class WishItemCreateOut(BaseModel):
 
 class WishItemDelete(BaseModel):
     detail: str
+
+
+# upper bound of products per bulk request
+BULK_MAX_ITEMS = 500
+
+
+class WishItemBulk(BaseModel):
+    add: List[str] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    remove: List[str] = Field(
+        default_factory=list, max_length=BULK_MAX_ITEMS
+    )
+
+
+class WishItemBulkStatus(BaseModel):
+    product_id: str
+    action: str
+    status: str
+
+
+class WishItemBulkOut(BaseModel):
+    items: List[WishItemBulkStatus]
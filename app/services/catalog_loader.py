@@ -0,0 +1,140 @@
+import csv
+import json
+import logging
+import mmap
+import time
+from itertools import islice
+from pathlib import Path
+from app.core.redis import bump_version
+from app.services.product_cache import PRODUCT_GENERATION_KEY
+from app.services.product_service import ProductService
+
+logger = logging.getLogger(__name__)
+
+# CSV columns are strings; coerce the numeric fields of ``Product``
+CSV_TYPES = {'id': int, 'price': float, 'reviewScore': float}
+
+
+def iter_jsonl(path: Path):
+    """Yields one product per line of a JSON Lines file.
+
+    The file is memory-mapped, so only the current line is materialized
+    no matter how large the snapshot is. Malformed lines yield None.
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b''):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    product = json.loads(line)
+                except ValueError:
+                    product = None
+                yield product
+
+
+def iter_csv(path: Path):
+    """Yields one product per row of a CSV file with a header row.
+
+    Rows with malformed numeric fields yield None.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            try:
+                product = {
+                    key: CSV_TYPES[key](value) if key in CSV_TYPES else value
+                    for key, value in row.items()
+                    if value not in ('', None)
+                }
+            except ValueError:
+                product = None
+            yield product
+
+
+def iter_products(path):
+    """Streams products from a JSONL (``.jsonl``/``.ndjson``) or CSV file.
+
+    Args:
+        path: Catalog snapshot file.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    path = Path(path)
+    if path.suffix in ('.jsonl', '.ndjson'):
+        return iter_jsonl(path)
+    if path.suffix == '.csv':
+        return iter_csv(path)
+    raise ValueError(f'Unsupported catalog format: {path.suffix}')
+
+
+async def load_products(
+    products,
+    chunk_size: int = 1000,
+    overwrite: bool = False,
+    progress_every: int = 50000,
+) -> dict:
+    """Writes products to the cache in pipelined chunks.
+
+    Only one chunk is held in memory at a time. Existing records are kept
+    unless ``overwrite`` is set, so re-running a load is safe and does not
+    replace data refreshed from the product API meanwhile. An overwriting
+    load bumps the product generation once at the end, so listing ETags
+    no longer match.
+
+    Args:
+        products: Iterable of product dicts with an ``id``.
+        chunk_size: Products written per round trip.
+        overwrite: Whether to replace existing records.
+        progress_every: Products read between progress log lines.
+
+    Returns:
+        dict: Counters of read, written, skipped and invalid products,
+        elapsed seconds and throughput.
+    """
+    stats = {'read': 0, 'written': 0, 'skipped': 0, 'invalid': 0}
+    started = time.perf_counter()
+    next_report = progress_every
+    products = iter(products)
+
+    while chunk := list(islice(products, chunk_size)):
+        valid = {}
+        for item in chunk:
+            if isinstance(item, dict) and item.get('id') is not None:
+                valid[item['id']] = item
+            else:
+                stats['invalid'] += 1
+
+        written = await ProductService.save_long_cache_many(valid, overwrite)
+        stats['read'] += len(chunk)
+        stats['written'] += written
+        stats['skipped'] += len(valid) - written
+
+        if stats['read'] >= next_report:
+            next_report += progress_every
+            logger.info('Catalog load progress', extra=dict(stats))
+
+    if overwrite and stats['written']:
+        await bump_version(PRODUCT_GENERATION_KEY)
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    stats['per_second'] = round(stats['read'] / max(stats['seconds'], 1e-6))
+    return stats
+
+
+async def load_catalog(path, **kwargs) -> dict:
+    """Loads a catalog snapshot file into the product cache.
+
+    Args:
+        path: JSONL or CSV file.
+        **kwargs: Passed to ``load_products``.
+
+    Returns:
+        dict: Load statistics.
+    """
+    stats = await load_products(iter_products(path), **kwargs)
+    logger.info('Catalog loaded', extra={'path': str(path), **stats})
+    return stats
@@ -0,0 +1,203 @@
+import json
+import logging
+import uuid
+from typing import NamedTuple
+from sqlalchemy import select
+from redis.exceptions import RedisError
+from app.core.cache_invalidation import (
+    INVALIDATION_CHANNEL,
+    invalidation_message,
+    register_cache,
+)
+from app.core.config import settings
+from app.core.memory_cache import MemoryCache
+from app.core.redis import batch, get_redis
+from app.models import Customer
+
+logger = logging.getLogger(__name__)
+
+identity_cache = MemoryCache(
+    max_entries=settings.CUSTOMER_IDENTITY_MEMORY_MAX_ENTRIES,
+    ttl=settings.CUSTOMER_IDENTITY_MEMORY_TTL,
+)
+register_cache('customer', identity_cache)
+
+# caches an identity only if no invalidation happened since the
+# generation was read, i.e. while its email was being read
+STORE_IDENTITY = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+INVALIDATE_IDENTITY = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('DEL', KEYS[1])
+"""
+
+
+def keys(customer_id) -> list[str]:
+    """Returns the identity and generation keys of a customer.
+
+    The hash tag keeps both keys in the same cluster slot, as the scripts
+    touch them together. The id is canonicalised, as it may arrive in any
+    spelling of the uuid.
+    """
+    try:
+        customer_id = uuid.UUID(str(customer_id))
+    except ValueError:
+        pass
+    prefix = f'customer:identity:{{{customer_id}}}'
+    return [prefix, f'{prefix}:generation']
+
+
+class CustomerIdentity(NamedTuple):
+    """What the ACL checks need to know about a customer."""
+
+    id: str
+    email: str
+    deleted: bool
+
+
+class CustomerIdentityCache:
+    """Customer identities cached in process and in Redis.
+
+    Lookups read the in-process LRU first, then Redis, so ACL checks do
+    not load the ``customers`` row. ``CustomerService`` invalidates both
+    layers, on every worker, whenever a customer changes.
+
+    Every invalidation bumps a generation. A lookup that misses returns
+    the generation it saw, and an identity read from the database
+    afterwards is only cached if the generation is still the same, so an
+    email changed meanwhile is never cached again.
+    """
+
+    @staticmethod
+    async def lookup(customer_id):
+        """Returns the cached identity of a customer, without touching the
+        database.
+
+        Args:
+            customer_id: ID of the customer.
+
+        Returns:
+            A tuple with the identity (None if not cached) and, on a miss,
+            the generation to pass to ``store`` (None if the identity must
+            not be cached, e.g. Redis is unavailable).
+        """
+        identity = identity_cache.get(keys(customer_id)[0])
+        if identity is not None:
+            return identity, None
+
+        try:
+            async with batch() as pipe:
+                for key in keys(customer_id):
+                    pipe.get(key)
+            raw, generation = pipe.results
+        except RedisError:
+            logger.exception('Could not read customer identity')
+            return None, None
+
+        generation = generation.decode() if generation else '0'
+        if raw is None:
+            return None, generation
+
+        data = json.loads(raw)
+        identity = CustomerIdentity(data['id'], data['email'], data['deleted'])
+        identity_cache.set(keys(customer_id)[0], identity)
+        return identity, None
+
+    @staticmethod
+    async def load(session, customer_id):
+        """Returns the identity of a customer, reading only its id, email
+        and deletion time from the database on a cache miss.
+
+        Args:
+            session: Database session.
+            customer_id: ID of the customer.
+
+        Returns:
+            CustomerIdentity | None: The identity, or None if the customer
+            does not exist.
+        """
+        generation = None
+        if settings.CUSTOMER_IDENTITY_CACHE_ENABLED:
+            identity, generation = await CustomerIdentityCache.lookup(
+                customer_id
+            )
+            if identity is not None:
+                return identity
+
+        row = (
+            await session.execute(
+                select(Customer.id, Customer.email, Customer.deleted_at)
+                .where(Customer.id == customer_id)
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+
+        identity = CustomerIdentity(
+            str(row.id), row.email, row.deleted_at is not None
+        )
+        await CustomerIdentityCache.store(customer_id, identity, generation)
+        return identity
+
+    @staticmethod
+    async def store(customer_id, identity: CustomerIdentity, generation):
+        """Caches an identity read after ``lookup`` returned
+        ``generation``.
+
+        Args:
+            customer_id: ID of the customer, as looked up.
+            identity: Identity read from the database.
+            generation: Generation returned by ``lookup``; nothing is
+                cached if None or if the customer was invalidated since.
+        """
+        if generation is None:
+            return
+
+        key = keys(customer_id)[0]
+        # set first, so an invalidation arriving meanwhile drops it
+        identity_cache.set(key, identity)
+        try:
+            stored = await get_redis().eval(
+                STORE_IDENTITY,
+                2,
+                *keys(customer_id),
+                generation,
+                json.dumps(identity._asdict()),
+                settings.CUSTOMER_IDENTITY_TTL,
+            )
+        except RedisError:
+            logger.exception('Could not cache customer identity')
+            stored = False
+        if not stored:
+            identity_cache.delete(key)
+
+    @staticmethod
+    async def invalidate(customer_id):
+        """Drops a customer's identity from every worker and from Redis.
+
+        Args:
+            customer_id: ID of the customer.
+        """
+        key = keys(customer_id)[0]
+        identity_cache.delete(key)
+        try:
+            async with batch() as pipe:
+                pipe.eval(
+                    INVALIDATE_IDENTITY,
+                    2,
+                    *keys(customer_id),
+                    2 * settings.CUSTOMER_IDENTITY_TTL,
+                )
+                pipe.publish(
+                    INVALIDATION_CHANNEL,
+                    invalidation_message('customer', [key]),
+                )
+        except RedisError:
+            logger.exception('Could not drop customer identity')
@@ -1,11 +1,39 @@
-from sqlalchemy import select
+from sqlalchemy import select, update as sql_update
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 from app.models.customer import Customer
+from app.services.customer_identity import CustomerIdentityCache
+from app.services.wishlist_cache import WishlistCache
 from fastapi import HTTPException
 
 
 class CustomerService:
+    @staticmethod
+    async def _check_identity(session, customer_id, current_user, message):
+        """Applies the existence and ACL checks to the customer's cached
+        identity, without loading the row.
+
+        The statement that follows must still match the identity's email,
+        so an identity gone stale meanwhile cannot grant access.
+
+        Returns:
+            CustomerIdentity: The identity of the active customer.
+
+        Raises:
+            HTTPException: 404 if the customer does not exist, 403 if a
+                customer targets another customer.
+        """
+        identity = await CustomerIdentityCache.load(session, customer_id)
+        if identity is None or identity.deleted:
+            raise HTTPException(404, 'Customer not found')
+
+        if (
+            'CUSTOMER' in current_user['roles']
+            and identity.email != current_user['email']
+        ):
+            raise HTTPException(403, message)
+        return identity
+
     @staticmethod
     async def get_by_email(session, customer_email, current_user):
         """Retrieves a customer by email.
@@ -98,25 +126,10 @@ class CustomerService:
             Updated customer data.
         """
 
-        query = await session.execute(
-            select(Customer).where(
-                Customer.id == customer_id, Customer.deleted_at.is_(None)
-            )
-        )
-        cust = query.scalar_one_or_none()
-
-        if not cust:
-            raise HTTPException(404, 'Customer not found')
-
         roles = current_user.get('roles', [])
 
         is_customer = 'CUSTOMER' in roles
 
-        if 'CUSTOMER' in current_user['roles'] and cust.email != current_user['email']:
-            raise HTTPException(
-                403, 'Customers can only update their own data'
-            )
-
         allowed_fields = ['name'] if is_customer else ['name', 'email']
 
         incoming_data = data.model_dump(exclude_unset=True)
@@ -126,14 +139,42 @@ class CustomerService:
             k: v for k, v in incoming_data.items() if k in allowed_fields
         }
 
-        if not sanitized_data:
-            raise HTTPException(400, 'No valid fields to update')
+        for _ in range(2):
+            identity = await CustomerService._check_identity(
+                session,
+                customer_id,
+                current_user,
+                'Customers can only update their own data',
+            )
 
-        for k, v in sanitized_data.items():
-            setattr(cust, k, v)
+            if not sanitized_data:
+                raise HTTPException(400, 'No valid fields to update')
+
+            query = (
+                sql_update(Customer)
+                .where(
+                    Customer.id == customer_id,
+                    Customer.deleted_at.is_(None),
+                    Customer.email == identity.email,
+                )
+                .values(**sanitized_data)
+                .returning(Customer)
+            )
+            cust = (await session.execute(query)).scalar_one_or_none()
+            if cust:
+                break
+
+            # stale identity: drop it and check again from the database
+            await CustomerIdentityCache.invalidate(customer_id)
+        else:
+            raise HTTPException(404, 'Customer not found')
 
         await session.commit()
-        await session.refresh(cust)
+
+        await CustomerIdentityCache.invalidate(customer_id)
+        # the wishlist index holds the email for its ACL check
+        if 'email' in sanitized_data:
+            await WishlistCache.invalidate(customer_id)
 
         return cust
 
@@ -150,20 +191,31 @@ class CustomerService:
             None.
         """
 
-        query = await session.execute(
-            select(Customer).where(
-                Customer.id == customer_id, Customer.deleted_at.is_(None)
+        for _ in range(2):
+            identity = await CustomerService._check_identity(
+                session,
+                customer_id,
+                current_user,
+                'Customers can only delete their own data',
             )
-        )
-        cust = query.scalar_one_or_none()
-
-        if not cust:
-            raise HTTPException(404, 'Customer not found')
 
-        if 'CUSTOMER' in current_user['roles'] and cust.email != current_user['email']:
-            raise HTTPException(
-                403, 'Customers can only delete their own data'
+            query = (
+                sql_update(Customer)
+                .where(
+                    Customer.id == customer_id,
+                    Customer.deleted_at.is_(None),
+                    Customer.email == identity.email,
+                )
+                .values(deleted_at=datetime.now(timezone.utc))
             )
+            if (await session.execute(query)).rowcount:
+                break
+
+            # stale identity: drop it and check again from the database
+            await CustomerIdentityCache.invalidate(customer_id)
+        else:
+            raise HTTPException(404, 'Customer not found')
 
-        cust.deleted_at = datetime.now(timezone.utc)
         await session.commit()
+        await CustomerIdentityCache.invalidate(customer_id)
+        await WishlistCache.invalidate(customer_id)
@@ -0,0 +1,123 @@
+import json
+import math
+import time
+from typing import NamedTuple
+from app.core import codec
+from app.core.config import settings
+from app.schemas.wishlist import Product
+
+# bump when the envelope layout changes
+RECORD_VERSION = 2
+
+# fields kept in cached payloads
+PRODUCT_FIELDS = tuple(Product.__annotations__)
+
+_codec = codec.resolve_codec(settings.PRODUCT_CACHE_CODEC)
+
+# bumped whenever a cached product's content changes
+PRODUCT_GENERATION_KEY = 'product:generation'
+
+# value of a legacy product:{id}:short key for a nonexistent product
+LEGACY_TOMBSTONE = b'-'
+
+
+def record_key(product_id) -> str:
+    """Returns the Redis key holding the cache record of a product."""
+    return f'product:{product_id}'
+
+
+def legacy_keys(product_id) -> tuple[str, str]:
+    """Returns the short and long keys of the previous two-key layout."""
+    return f'product:{product_id}:short', f'product:{product_id}:long'
+
+
+class CacheRecord(NamedTuple):
+    """Product cache entry with its freshness metadata.
+
+    A single Redis key holds the record for as long as it may be used as
+    a fallback (the former long TTL). Whether it is still fresh (the former
+    short TTL) is decided in Python from ``soft_expiry``.
+    """
+
+    payload: dict | None   # None marks a product that does not exist
+    fetched_at: float      # epoch seconds
+    soft_expiry: float     # epoch seconds
+    delta: float = 0.0     # seconds the upstream fetch took
+
+    @property
+    def is_tombstone(self) -> bool:
+        return self.payload is None
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return (time.time() if now is None else now) < self.soft_expiry
+
+
+def trim_product(data):
+    """Keeps only the fields of the ``Product`` schema."""
+    if not isinstance(data, dict):
+        return data
+    return {k: data[k] for k in PRODUCT_FIELDS if k in data}
+
+
+def encode_record(record: CacheRecord) -> bytes:
+    """Serializes a record as a versioned envelope with the configured
+    codec."""
+    return codec.encode(
+        [
+            RECORD_VERSION,
+            round(record.fetched_at, 3),
+            # rounded down, so a record never comes back fresher
+            math.floor(record.soft_expiry * 1000) / 1000,
+            round(record.delta, 4),
+            record.payload,
+        ],
+        _codec,
+        settings.PRODUCT_CACHE_COMPRESS_MIN_BYTES,
+    )
+
+
+def decode_record(raw) -> CacheRecord | None:
+    """Parses an envelope, returning None for absent or unknown values.
+
+    Version 1 envelopes (JSON objects) are still accepted.
+    """
+    if raw is None:
+        return None
+
+    try:
+        data = codec.decode(raw)
+    except ValueError:
+        return None
+
+    if isinstance(data, list) and data and data[0] == RECORD_VERSION:
+        _, fetched_at, soft_expiry, delta, payload = data
+        return CacheRecord(payload, fetched_at, soft_expiry, delta)
+
+    if isinstance(data, dict) and data.get('v') == 1:
+        return CacheRecord(data['p'], data['f'], data['s'], data.get('d', 0.0))
+
+    return None
+
+
+def record_from_legacy(short_value, long_value, now, fresh_for, tombstone_for):
+    """Builds a record from the values of the previous two-key layout.
+
+    Args:
+        short_value: Raw value of ``product:{id}:short`` or None.
+        long_value: Raw value of ``product:{id}:long`` or None.
+        now: Current epoch seconds.
+        fresh_for: Seconds a short value is still considered fresh.
+        tombstone_for: Seconds a legacy tombstone is kept.
+
+    Returns:
+        CacheRecord | None: The converted record, if any value existed.
+    """
+    if short_value == LEGACY_TOMBSTONE:
+        return CacheRecord(None, now, now + tombstone_for)
+    if short_value:
+        payload = trim_product(json.loads(short_value))
+        return CacheRecord(payload, now, now + fresh_for)
+    if long_value:
+        # long entries were fallbacks only: usable, but already stale
+        return CacheRecord(trim_product(json.loads(long_value)), now, now)
+    return None
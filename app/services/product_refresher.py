@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+import uuid
+from app.core.config import settings
+from app.core.redis import batch, get_redis
+from app.services.product_cache import decode_record, record_key
+from app.services.product_service import (
+    ProductService,
+    access_counts,
+    product_api_breaker,
+)
+from app.services.wishlist_popularity import WishlistPopularity
+
+logger = logging.getLogger(__name__)
+
+ACCESS_KEY = 'product:access:{}'
+ACCESS_BUCKET_SECONDS = 3600
+LOCK_KEY = 'product:refresher:lock'
+
+
+class ProductRefresher:
+    @staticmethod
+    async def flush_access_counts():
+        """Adds this worker's product access counters to the current
+        hourly bucket in Redis and resets them."""
+        if not access_counts:
+            return
+
+        counts = dict(access_counts)
+        access_counts.clear()
+
+        key = ACCESS_KEY.format(int(time.time()) // ACCESS_BUCKET_SECONDS)
+        async with batch(retry=False) as pipe:
+            for pid, count in counts.items():
+                pipe.zincrby(key, count, pid)
+            pipe.expire(key, 2 * ACCESS_BUCKET_SECONDS)
+
+    @staticmethod
+    async def run_access_flusher():
+        """Flushes this worker's access counters every
+        ``PRODUCT_ACCESS_FLUSH_INTERVAL`` seconds until cancelled.
+
+        Runs in every API worker, whether or not it also runs the
+        refresher.
+        """
+        while True:
+            await asyncio.sleep(settings.PRODUCT_ACCESS_FLUSH_INTERVAL)
+            try:
+                await ProductRefresher.flush_access_counts()
+            except Exception:
+                logger.exception('Could not flush product access counters')
+
+    @staticmethod
+    async def hot_product_ids(limit: int):
+        """Returns the hot product set.
+
+        It is the union of the most wishlisted active products (from the
+        popularity counters) and the most accessed products over the
+        current and previous hour.
+
+        Args:
+            limit: Maximum number of products taken from each source.
+
+        Returns:
+            list[str]: Product ids, most popular first.
+        """
+        wishlisted = await WishlistPopularity.top(limit)
+
+        bucket = int(time.time()) // ACCESS_BUCKET_SECONDS
+        keys = [ACCESS_KEY.format(bucket), ACCESS_KEY.format(bucket - 1)]
+        async with batch() as pipe:
+            pipe.zunionstore('product:access:hot', keys)
+            pipe.zrevrange('product:access:hot', 0, limit - 1)
+            pipe.delete('product:access:hot')
+        _, accessed, _ = pipe.results
+
+        hot = dict.fromkeys(pid for pid, _ in wishlisted)
+        hot.update(dict.fromkeys(pid.decode() for pid in accessed))
+        return list(hot)
+
+    @staticmethod
+    async def refresh_once():
+        """Refreshes hot products whose record is missing or about to
+        become stale, in rate-limited batches.
+
+        Returns:
+            int: Number of products refreshed.
+        """
+        hot = await ProductRefresher.hot_product_ids(
+            settings.PRODUCT_REFRESH_HOT_LIMIT
+        )
+
+        refreshed = 0
+        batch_size = settings.PRODUCT_REFRESH_BATCH_SIZE
+        for start in range(0, len(hot), batch_size):
+            if not product_api_breaker.available():
+                logger.warning('Product API circuit open, refresh paused')
+                break
+
+            batch = hot[start:start + batch_size]
+            raw = await get_redis().mget([record_key(pid) for pid in batch])
+            horizon = time.time() + settings.PRODUCT_REFRESH_AHEAD
+            due = [
+                pid
+                for pid, value in zip(batch, raw)
+                if (record := decode_record(value)) is None
+                or record.soft_expiry < horizon
+            ]
+            if not due:
+                continue
+
+            await ProductService.resolve_misses(due)
+            refreshed += len(due)
+            await asyncio.sleep(settings.PRODUCT_REFRESH_BATCH_DELAY)
+
+        return refreshed
+
+    @staticmethod
+    async def run():
+        """On the worker holding the refresher lock, refreshes hot
+        products every ``PRODUCT_REFRESH_INTERVAL`` seconds until
+        cancelled."""
+        interval = settings.PRODUCT_REFRESH_INTERVAL
+        token = uuid.uuid4().hex
+
+        while True:
+            try:
+                client = get_redis()
+                leader = await client.set(
+                    LOCK_KEY, token, nx=True, px=int(interval * 1000)
+                ) or await client.get(LOCK_KEY) == token.encode()
+
+                if leader:
+                    started = time.perf_counter()
+                    refreshed = await ProductRefresher.refresh_once()
+                    elapsed = time.perf_counter() - started
+                    logger.info(
+                        'Hot products refreshed',
+                        extra={
+                            'refreshed': refreshed,
+                            'seconds': round(elapsed, 3),
+                        },
+                    )
+
+            except Exception:
+                logger.exception('Product refresher failed')
+
+            await asyncio.sleep(interval)
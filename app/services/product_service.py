@@ -1,58 +1,725 @@
+import asyncio
+import math
+import random
+import time
+import uuid
+from collections import Counter
 import httpx
-import json
-from app.core.redis import redis
+from app.core.cache_invalidation import (
+    INVALIDATION_CHANNEL,
+    invalidation_message,
+    register_cache,
+)
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.memory_cache import MemoryCache
+from app.core.redis import batch, bump_version, get_redis
+from app.services.product_cache import (
+    PRODUCT_GENERATION_KEY,
+    CacheRecord,
+    decode_record,
+    encode_record,
+    legacy_keys,
+    record_from_legacy,
+    record_key,
+    trim_product,
+)
 
 SHORT_TTL = 60 * 5       # 5 min
 LONG_TTL = 60 * 60 * 24  # 24h
 
+# L1 in front of the fresh product:{id} records
+memory_cache = MemoryCache(
+    max_entries=settings.PRODUCT_MEMORY_MAX_ENTRIES,
+    max_bytes=settings.PRODUCT_MEMORY_MAX_BYTES,
+    ttl=settings.PRODUCT_MEMORY_TTL,
+)
+register_cache('product', memory_cache)
+
+product_api_breaker = CircuitBreaker(
+    'product_api',
+    # a 404 is a valid answer, not an upstream failure
+    is_failure=lambda exc: not isinstance(exc, ProductNotFoundError),
+    failure_rate_threshold=settings.PRODUCT_CIRCUIT_FAILURE_RATE,
+    slow_call_rate_threshold=settings.PRODUCT_CIRCUIT_SLOW_CALL_RATE,
+    slow_call_duration=settings.PRODUCT_CIRCUIT_SLOW_CALL_DURATION,
+    window_size=settings.PRODUCT_CIRCUIT_WINDOW_SIZE,
+    minimum_calls=settings.PRODUCT_CIRCUIT_MINIMUM_CALLS,
+    cooldown=settings.PRODUCT_CIRCUIT_COOLDOWN,
+    half_open_max_calls=settings.PRODUCT_CIRCUIT_HALF_OPEN_CALLS,
+    shared=settings.PRODUCT_CIRCUIT_SHARED,
+)
+
+# process-wide limit of concurrent product API requests
+api_semaphore = asyncio.Semaphore(settings.PRODUCT_API_CONCURRENCY)
+
+# single-flight: product id -> future shared by concurrent callers
+_inflight = {}
+
+# strong references to detached refresh tasks
+_background_tasks = set()
+
+# moving average of the product API latency in seconds, used by XFetch
+_fetch_latency = {'ewma': 0.1}
+
+# lookup outcomes other than a successful read, by class
+lookup_errors = Counter()
+
+# product lookups since the last flush, used to find hot products; at most
+# PRODUCT_ACCESS_MAX_KEYS products are tracked between flushes
+access_counts = Counter()
+
+
+def count_access(product_ids):
+    """Counts lookups of products already tracked, and of new ones while
+    the counter has room."""
+    if not settings.PRODUCT_ACCESS_TRACKING_ENABLED:
+        return
+    room = settings.PRODUCT_ACCESS_MAX_KEYS - len(access_counts)
+    for pid in product_ids:
+        if pid in access_counts:
+            access_counts[pid] += 1
+        elif room > 0:
+            access_counts[pid] = 1
+            room -= 1
+
+# deletes the lease keys still owned by the given token
+RELEASE_LEASES = '''
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+return 1
+'''
+
+
+def jittered(ttl: int) -> int:
+    """Spreads a TTL by +/- PRODUCT_TTL_JITTER so keys written together
+    do not expire together."""
+    spread = ttl * settings.PRODUCT_TTL_JITTER
+    return max(1, round(ttl + random.uniform(-spread, spread)))
+
+
+class LeaseTimeoutError(Exception):
+    """Another worker holds the refresh lease and did not finish in time."""
+
+
+class ProductNotFoundError(Exception):
+    """The product API answered that the product does not exist."""
+
+
+def classify_error(exc: Exception) -> str:
+    """Maps a product lookup failure to a counter name.
+
+    Only ``not_found`` is definitive; every other class is transient and
+    falls back to the long cache.
+    """
+    if isinstance(exc, ProductNotFoundError):
+        return 'not_found'
+    if isinstance(exc, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(exc, LeaseTimeoutError):
+        return 'lease_timeout'
+    if isinstance(exc, httpx.TimeoutException):
+        return 'timeout'
+    if isinstance(exc, httpx.HTTPStatusError):
+        return 'upstream_status'
+    if isinstance(exc, httpx.TransportError):
+        return 'connection'
+    return 'other'
+
 
 class ProductService:
     BASE_URL = 'http://challenge-api.luizalabs.com/api/product/{}'  # exemplo
 
     @staticmethod
     async def get_product(product_id: str):
-        """Fetches a product using short cache, API fallback, and long cache.
-        
+        """Fetches a product using memory, cache, API fallback, and stale
+        cache.
+
         Args:
             product_id: Identifier of the product.
 
         Returns:
             A tuple with product data or None, and the source type.
         """
-        short_key = f'product:{product_id}:short'
-        long_key = f'product:{product_id}:long'
+        product_id = str(product_id)
+        return (await ProductService.get_products([product_id]))[product_id]
+
+    @staticmethod
+    async def get_products(product_ids):
+        """Fetches many products with batched cache reads and API calls.
+
+        Each product has a single cache record; one MGET returns the
+        payload together with its freshness metadata. Fresh records are
+        served as ``cache_short``. Missing records are requested from the
+        API concurrently (bounded by ``PRODUCT_API_CONCURRENCY``). With
+        ``PRODUCT_STALE_WHILE_REVALIDATE`` stale records are returned right
+        away as ``cache_stale`` and refreshed in the background; otherwise
+        they are refreshed first and only served as ``cache_long`` if the
+        API fails. Fresh records close to expiry are refreshed early with
+        probability growing as the soft TTL runs out (XFetch).
+
+        Args:
+            product_ids: Identifiers of the products.
+
+        Returns:
+            A dict mapping each product id to a tuple with product data or
+            None, and the source type.
+        """
+        results, misses, records = await ProductService._read_cached(
+            product_ids
+        )
+        if not misses:
+            return results
+
+        # 3) concurrent direct requests, coalesced with concurrent callers;
+        # skipped while the product API circuit is open
+        if product_api_breaker.available():
+            outcomes = await ProductService.resolve_misses(misses)
+        else:
+            lookup_errors['circuit_open'] += len(misses)
+            outcomes = {pid: CircuitOpenError(pid) for pid in misses}
 
-        # 1) get product from cache with ttl short
-        cached = await redis.get(short_key)
-        if cached:
-            return json.loads(cached), 'cache_short'
+        for pid in misses:
+            results[pid] = ProductService._fallback(
+                pid, outcomes[pid], records
+            )
+        return results
+
+    @staticmethod
+    async def iter_products(product_ids):
+        """Yields products as soon as each one resolves.
 
-        # 2) direct request
+        Same lookup as ``get_products``, but cached products are yielded
+        right after the cache read and each API-resolved product as soon
+        as its own request completes, instead of after the slowest one.
+
+        Args:
+            product_ids: Identifiers of the products.
+
+        Yields:
+            Tuples with the product id and a tuple with product data or
+            None, and the source type.
+        """
+        results, misses, records = await ProductService._read_cached(
+            product_ids
+        )
+        for item in results.items():
+            yield item
+        if not misses:
+            return
+
+        if not product_api_breaker.available():
+            lookup_errors['circuit_open'] += len(misses)
+            for pid in misses:
+                yield pid, ProductService._fallback(
+                    pid, CircuitOpenError(pid), records
+                )
+            return
+
+        waiting = {
+            asyncio.shield(future): pid
+            for pid, future in ProductService._miss_futures(misses).items()
+        }
         try:
-            async with httpx.AsyncClient(timeout=3) as c:
-                r = await c.get(ProductService.BASE_URL.format(product_id))
-                r.raise_for_status()
-                data = r.json()
+            while waiting:
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    pid = waiting.pop(future)
+                    outcome = future.exception() or future.result()
+                    yield pid, ProductService._fallback(pid, outcome, records)
+        finally:
+            # the consumer went away; the shared refresh keeps running
+            for future in waiting:
+                future.cancel()
+
+    @staticmethod
+    def _fallback(product_id, outcome, records):
+        """Falls back to the stale record of a product that failed."""
+        if not isinstance(outcome, Exception):
+            return outcome
+        if product_id in records:
+            return records[product_id][0].payload, 'cache_long'
+        return None, 'not_found'
+
+    @staticmethod
+    async def _read_cached(product_ids):
+        """Serves products from memory and Redis.
+
+        Returns:
+            A tuple with the dict of products served from cache, the ids
+            that still need the API and the dict of decoded records (with
+            their size) read from Redis.
+        """
+        ids = list(dict.fromkeys(str(pid) for pid in product_ids))
+        count_access(ids)
+        results = {}
 
-            # save to cache
-            await redis.set(short_key, json.dumps(data), ex=SHORT_TTL)
-            return data, 'api'
+        # 0) get products from process memory
+        pending = []
+        for pid in ids:
+            data = memory_cache.get(pid)
+            if data is not None:
+                results[pid] = (data, 'memory')
+            else:
+                pending.append(pid)
 
-        except Exception:
-            # 3) get product from cache with ttl long
-            cached_long = await redis.get(long_key)
-            if cached_long:
-                return json.loads(cached_long), 'cache_long'
+        if not pending:
+            return results, [], {}
 
-            return None, 'not_found'
+        # 1) get product records from redis
+        raw = await get_redis().mget([record_key(pid) for pid in pending])
+        records = {}
+        absent = []
+        for pid, value in zip(pending, raw):
+            record = decode_record(value)
+            if record is None:
+                absent.append(pid)
+            else:
+                records[pid] = (record, len(value))
+
+        if absent and settings.PRODUCT_CACHE_LEGACY_READ:
+            records.update(await ProductService._read_legacy(absent))
+
+        now = time.time()
+        misses = []
+        stale = []
+        early = []
+        for pid in pending:
+            record, size = records.get(pid, (None, 0))
+            if record is None:
+                misses.append(pid)
+            elif record.is_tombstone:
+                lookup_errors['tombstone_hit'] += 1
+                results[pid] = (None, 'not_found')
+            elif record.is_fresh(now):
+                memory_cache.set(pid, record.payload, size=size)
+                results[pid] = (record.payload, 'cache_short')
+                if ProductService._should_refresh_early(record, now):
+                    early.append(pid)
+            elif settings.PRODUCT_STALE_WHILE_REVALIDATE:
+                # 2) serve stale records while revalidating
+                results[pid] = (record.payload, 'cache_stale')
+                early.append(pid)
+            else:
+                stale.append(pid)
+
+        if early:
+            ProductService._schedule_refresh(early)
+
+        return results, misses + stale, records
+
+    @staticmethod
+    async def _read_legacy(product_ids):
+        """Reads products still stored in the previous two-key layout.
+
+        Converted records are written to the new layout without
+        overwriting records written meanwhile.
+
+        Args:
+            product_ids: Identifiers without a record in the new layout.
+
+        Returns:
+            A dict mapping product id to a tuple with the record and its
+            approximate size.
+        """
+        keys = [key for pid in product_ids for key in legacy_keys(pid)]
+        values = await get_redis().mget(keys)
+
+        now = time.time()
+        records = {}
+        async with batch() as pipe:
+            for i, pid in enumerate(product_ids):
+                short_value, long_value = values[2 * i], values[2 * i + 1]
+                record = record_from_legacy(
+                    short_value,
+                    long_value,
+                    now,
+                    fresh_for=jittered(SHORT_TTL),
+                    tombstone_for=settings.PRODUCT_NOT_FOUND_TTL,
+                )
+                if record is None:
+                    continue
+
+                encoded = encode_record(record)
+                records[pid] = (record, len(encoded))
+                ttl = (
+                    settings.PRODUCT_NOT_FOUND_TTL
+                    if record.is_tombstone
+                    else jittered(LONG_TTL)
+                )
+                pipe.set(record_key(pid), encoded, ex=ttl, nx=True)
+
+        return records
+
+    @staticmethod
+    def _should_refresh_early(record: CacheRecord, now: float):
+        """XFetch: decides whether a fresh record should be refreshed now.
+
+        Args:
+            record: Fresh cache record.
+            now: Current epoch seconds.
+
+        Returns:
+            bool: True with a probability that grows as the soft expiry
+            approaches, scaled by how long the record took to fetch.
+        """
+        if settings.PRODUCT_XFETCH_BETA <= 0:
+            return False
+
+        delta = record.delta or _fetch_latency['ewma']
+        gap = (
+            -delta
+            * settings.PRODUCT_XFETCH_BETA
+            * math.log(1.0 - random.random())
+        )
+        return now + gap >= record.soft_expiry
+
+    @staticmethod
+    def _schedule_refresh(product_ids):
+        """Refreshes products in the background, skipping in-flight ones.
+
+        Args:
+            product_ids: Identifiers of the products.
+        """
+        pids = [pid for pid in product_ids if pid not in _inflight]
+        if not pids or not product_api_breaker.available():
+            return
+
+        task = asyncio.create_task(ProductService.resolve_misses(pids))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    @staticmethod
+    async def resolve_misses(product_ids):
+        """Refreshes products with single-flight semantics.
+
+        Concurrent callers in this process asking for the same product
+        share one refresh. Across workers, a short Redis lease lets a
+        single worker call the product API while the others poll the
+        cache for its result.
+
+        Args:
+            product_ids: Identifiers of products without a fresh record.
+
+        Returns:
+            A dict mapping each product id to a tuple with product data and
+            source type, or to the exception that prevented the refresh.
+        """
+        futures = ProductService._miss_futures(product_ids)
+        outcomes = await asyncio.gather(
+            *(asyncio.shield(f) for f in futures.values()),
+            return_exceptions=True,
+        )
+        return dict(zip(futures, outcomes))
+
+    @staticmethod
+    def _miss_futures(product_ids):
+        """Returns the single-flight futures of products, starting one
+        refresh for those nobody in this process is refreshing yet."""
+        loop = asyncio.get_running_loop()
+        futures = {}
+        owned = {}
+        for pid in product_ids:
+            future = _inflight.get(pid)
+            if future is None:
+                future = loop.create_future()
+                # avoid "exception was never retrieved" if every caller
+                # was cancelled
+                future.add_done_callback(
+                    lambda f: f.cancelled() or f.exception()
+                )
+                _inflight[pid] = future
+                owned[pid] = future
+            futures[pid] = future
+
+        if owned:
+            # runs detached so a cancelled caller does not strand the others
+            task = asyncio.create_task(ProductService._refresh(owned))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+        return futures
+
+    @staticmethod
+    async def _refresh(futures):
+        """Refreshes products and settles their single-flight futures.
+
+        Args:
+            futures: Dict mapping product id to its pending future.
+        """
+        pids = list(futures)
+        outcomes = {}
+        try:
+            token = uuid.uuid4().hex
+
+            # 1) acquire refresh leases in one round trip
+            async with batch() as pipe:
+                for pid in pids:
+                    pipe.set(
+                        f'product:{pid}:lease',
+                        token,
+                        nx=True,
+                        px=settings.PRODUCT_LEASE_TTL_MS,
+                    )
+            acquired = pipe.results
+
+            leased = [pid for pid, ok in zip(pids, acquired) if ok]
+            waiting = [pid for pid, ok in zip(pids, acquired) if not ok]
+
+            # 2) fetch leased products concurrently
+            if leased:
+
+                async def fetch(pid):
+                    async with api_semaphore:
+                        started = time.perf_counter()
+                        data = await ProductService.fetch_from_api(pid)
+                        elapsed = time.perf_counter() - started
+                    # answer callers right away; the cache write below is
+                    # batched with the other products
+                    if not futures[pid].done():
+                        futures[pid].set_result((data, 'api'))
+                    return data, elapsed
+
+                responses = await asyncio.gather(
+                    *(fetch(pid) for pid in leased), return_exceptions=True
+                )
+                fetched = {}
+                deltas = {}
+                missing = []
+                for pid, response in zip(leased, responses):
+                    if isinstance(response, ProductNotFoundError):
+                        lookup_errors['not_found'] += 1
+                        missing.append(pid)
+                        outcomes[pid] = (None, 'not_found')
+                    elif isinstance(response, Exception):
+                        lookup_errors[classify_error(response)] += 1
+                        outcomes[pid] = response
+                    else:
+                        fetched[pid], deltas[pid] = response
+                        outcomes[pid] = (fetched[pid], 'api')
+                        _fetch_latency['ewma'] = (
+                            0.9 * _fetch_latency['ewma'] + 0.1 * deltas[pid]
+                        )
+
+                await ProductService.save_products(
+                    fetched,
+                    missing=missing,
+                    deltas=deltas,
+                    release=(leased, token),
+                )
+
+            # 3) wait for the workers holding the other leases
+            if waiting:
+                outcomes.update(
+                    await ProductService._wait_for_refresh(waiting)
+                )
+
+        except Exception as e:
+            for pid in pids:
+                outcomes.setdefault(pid, e)
+
+        finally:
+            for pid, future in futures.items():
+                _inflight.pop(pid, None)
+                if future.done():
+                    continue
+                outcome = outcomes.get(pid) or LeaseTimeoutError(pid)
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    @staticmethod
+    async def _wait_for_refresh(product_ids):
+        """Polls the cache while other workers refresh products.
+
+        Args:
+            product_ids: Identifiers leased by other workers.
+
+        Returns:
+            A dict mapping each product id to a tuple with product data and
+            source type, or to LeaseTimeoutError.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.PRODUCT_LEASE_WAIT_MS / 1000
+        pending = list(product_ids)
+        outcomes = {}
+
+        while pending and loop.time() < deadline:
+            await asyncio.sleep(settings.PRODUCT_LEASE_POLL_MS / 1000)
+            raw = await get_redis().mget([record_key(pid) for pid in pending])
+            now = time.time()
+            still_pending = []
+            for pid, value in zip(pending, raw):
+                record = decode_record(value)
+                if record is None or not record.is_fresh(now):
+                    still_pending.append(pid)
+                elif record.is_tombstone:
+                    outcomes[pid] = (None, 'not_found')
+                else:
+                    memory_cache.set(pid, record.payload, size=len(value))
+                    outcomes[pid] = (record.payload, 'cache_short')
+            pending = still_pending
+
+        lookup_errors['lease_timeout'] += len(pending)
+        for pid in pending:
+            outcomes[pid] = LeaseTimeoutError(pid)
+        return outcomes
+
+    @staticmethod
+    async def fetch_from_api(product_id):
+        """Requests a product from the external product API.
+
+        Args:
+            product_id: Identifier of the product.
+
+        Returns:
+            Product data, trimmed to the ``Product`` schema fields.
+
+        Raises:
+            ProductNotFoundError: If the API answers 404.
+            httpx.HTTPError: If the request fails or the API returns
+                another error status.
+            CircuitOpenError: If the product API circuit is open.
+        """
+        async with product_api_breaker.guard():
+            r = await get_http_client().get(
+                ProductService.BASE_URL.format(product_id)
+            )
+            if r.status_code == 404:
+                raise ProductNotFoundError(product_id)
+            r.raise_for_status()
+            return trim_product(r.json())
+
+    @staticmethod
+    async def save_products(products, missing=(), deltas=None, release=None):
+        """Stores freshly fetched products in cache and memory.
+
+        Each product gets a record that is fresh for the (jittered) short
+        TTL and kept for the long TTL. Products the API reported as
+        nonexistent get a tombstone record with its own TTL. The writes,
+        the invalidation of other workers' memory caches and the release
+        of refresh leases are sent in a single pipeline.
+
+        Args:
+            products: Dict mapping product id to product data.
+            missing: Identifiers of products that do not exist.
+            deltas: Optional dict mapping product id to fetch duration.
+            release: Optional tuple with the leased product ids and the
+                lease token.
+        """
+        if not products and not missing and not release:
+            return
+
+        deltas = deltas or {}
+        now = time.time()
+        async with batch() as pipe:
+            for pid, data in products.items():
+                record = CacheRecord(
+                    data,
+                    now,
+                    now + jittered(SHORT_TTL),
+                    deltas.get(pid, 0.0),
+                )
+                encoded = encode_record(record)
+                pipe.set(
+                    record_key(pid), encoded, ex=jittered(LONG_TTL), get=True
+                )
+                memory_cache.set(str(pid), data, size=len(encoded))
+            for pid in missing:
+                ttl = jittered(settings.PRODUCT_NOT_FOUND_TTL)
+                record = CacheRecord(None, now, now + ttl)
+                pipe.set(
+                    record_key(pid), encode_record(record), ex=ttl, get=True
+                )
+                memory_cache.delete(str(pid))
+            if products or missing:
+                pipe.publish(
+                    INVALIDATION_CHANNEL,
+                    invalidation_message(
+                        'product', [*products.keys(), *missing]
+                    ),
+                )
+            if release:
+                leased, token = release
+                pipe.eval(
+                    RELEASE_LEASES,
+                    len(leased),
+                    *[f'product:{pid}:lease' for pid in leased],
+                    token,
+                )
+
+        # SET ... GET replied the previous records; listings only need new
+        # ETags when some product content actually changed
+        previous = pipe.results[: len(products) + len(missing)]
+        current = [*products.values(), *(None for _ in missing)]
+        for old, data in zip(previous, current):
+            record = decode_record(old)
+            if record is None or record.payload != data:
+                await bump_version(PRODUCT_GENERATION_KEY)
+                break
 
     @staticmethod
     async def save_long_cache(product_id, data):
-        """Stores product data in long cache.
+        """Stores product data as a fallback-only (already stale) record.
+
+        An existing record is kept, since it is at least as recent.
 
         Args:
             product_id: Identifier of the product.
             data: Product data to be cached.
         """
-        key = f'product:{product_id}:long'
-        await redis.set(key, json.dumps(data), ex=LONG_TTL)
+        await ProductService.save_long_cache_many({product_id: data})
+
+    @staticmethod
+    async def save_long_cache_many(products, overwrite: bool = False):
+        """Stores many products as fallback-only records in one round trip.
+
+        Overwritten records are also dropped from every worker's memory
+        cache; the caller bumps ``PRODUCT_GENERATION_KEY`` once it is done,
+        so listing ETags change.
+
+        Args:
+            products: Dict mapping product id to product data.
+            overwrite: Whether to replace existing records; by default
+                they are kept, since they are at least as recent.
+
+        Returns:
+            int: Number of records written.
+        """
+        if not products:
+            return 0
+
+        now = time.time()
+        async with batch() as pipe:
+            for pid, data in products.items():
+                pipe.set(
+                    record_key(pid),
+                    encode_record(CacheRecord(trim_product(data), now, now)),
+                    ex=jittered(LONG_TTL),
+                    nx=not overwrite,
+                )
+                if overwrite:
+                    memory_cache.delete(str(pid))
+            if overwrite:
+                pipe.publish(
+                    INVALIDATION_CHANNEL,
+                    invalidation_message('product', list(products.keys())),
+                )
+        return sum(1 for reply in pipe.results[: len(products)] if reply)
+
+    @staticmethod
+    def cache_stats():
+        """Returns the in-process product cache counters."""
+        return {'memory': memory_cache.stats(), 'errors': dict(lookup_errors)}
+
+    @staticmethod
+    def circuit_stats():
+        """Returns the product API circuit breaker state."""
+        return product_api_breaker.stats()
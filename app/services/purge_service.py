@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select, tuple_, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import (
+    Customer,
+    CustomerArchive,
+    WishlistItem,
+    WishlistItemArchive,
+)
+from app.services.wishlist_popularity import WishlistPopularity
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeService:
+    """Maintenance of soft-deleted rows.
+
+    Every step works in batches of at most ``batch_size`` rows, each in
+    its own short transaction that locks only its batch with ``FOR UPDATE
+    SKIP LOCKED``; rows held by live requests (or by another purge
+    running concurrently) are left for the next batch or run.
+    """
+
+    @staticmethod
+    def _cascade_query(limit: int):
+        """Soft-deletes active items of soft-deleted customers, with the
+        customer's deletion time.
+
+        Returns:
+            The statement, returning the product id of each item.
+        """
+        batch = (
+            select(
+                WishlistItem.customer_id,
+                WishlistItem.id,
+                Customer.deleted_at.label('customer_deleted_at'),
+            )
+            .join(Customer, Customer.id == WishlistItem.customer_id)
+            .where(
+                WishlistItem.deleted_at.is_(None),
+                Customer.deleted_at.isnot(None),
+            )
+            .limit(limit)
+            .with_for_update(of=WishlistItem, skip_locked=True)
+            .cte('batch')
+        )
+        return (
+            update(WishlistItem)
+            .where(
+                # the partitioned layout has no index on id alone
+                WishlistItem.customer_id == batch.c.customer_id,
+                WishlistItem.id == batch.c.id,
+            )
+            .values(deleted_at=batch.c.customer_deleted_at)
+            .returning(WishlistItem.product_id)
+        )
+
+    @staticmethod
+    def _purge_query(model, archive_model, cutoff, limit, condition=None):
+        """Deletes (and optionally archives) rows deleted before cutoff.
+
+        Args:
+            model: Live model.
+            archive_model: Archive model with the same columns, or None to
+                delete only.
+            cutoff: Rows soft-deleted before this time are purged.
+            limit: Maximum number of rows.
+            condition: Extra condition on the rows.
+
+        Returns:
+            The statement; its row count is the number of rows purged.
+        """
+        # the partitioned layout has no index on id alone
+        key = [model.id]
+        if model is WishlistItem:
+            key.insert(0, model.customer_id)
+
+        batch = select(*key).where(model.deleted_at < cutoff)
+        if condition is not None:
+            batch = batch.where(condition)
+        batch = batch.limit(limit).with_for_update(skip_locked=True)
+
+        purged = delete(model).where(tuple_(*key).in_(batch))
+        if archive_model is None:
+            return purged
+
+        columns = [
+            column.name
+            for column in archive_model.__table__.columns
+            if column.name != 'archived_at'
+        ]
+        purged = purged.returning(
+            *(model.__table__.c[name] for name in columns)
+        ).cte('purged')
+        return insert(archive_model).from_select(
+            columns, select(*(purged.c[name] for name in columns))
+        )
+
+    @staticmethod
+    async def _run_step(name, build, batch_size, delay, on_rows=None):
+        """Runs one statement in batches until a batch comes back short.
+
+        Returns:
+            dict: Rows, elapsed seconds and throughput of the step.
+        """
+        rows = 0
+        started = time.perf_counter()
+        while True:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(build(batch_size))
+                if on_rows is not None:
+                    changed = result.scalars().all()
+                    count = len(changed)
+                else:
+                    count = result.rowcount
+                await session.commit()
+
+            if on_rows is not None and changed:
+                await on_rows(changed)
+            rows += count
+            if count < batch_size:
+                break
+            await asyncio.sleep(delay)
+
+        seconds = round(time.perf_counter() - started, 3)
+        stats = {
+            'rows': rows,
+            'seconds': seconds,
+            'per_second': round(rows / max(seconds, 1e-6)),
+        }
+        logger.info('Purge step done', extra={'step': name, **stats})
+        return stats
+
+    @staticmethod
+    async def purge(
+        retention_days: int = None,
+        batch_size: int = None,
+        delay: float = None,
+        archive: bool = None,
+    ) -> dict:
+        """Cascades customer soft-deletes and purges expired rows.
+
+        Steps, in order:
+
+        1. ``cascade``: soft-deletes the active items of soft-deleted
+           customers, dated like the customer.
+        2. ``items``: removes items soft-deleted more than
+           ``retention_days`` ago.
+        3. ``customers``: removes customers soft-deleted more than
+           ``retention_days`` ago and with no item left.
+
+        Removed rows are moved to the archive tables when ``archive`` is
+        set, otherwise deleted. Unset arguments default to the ``PURGE_*``
+        settings.
+
+        Args:
+            retention_days: How long soft-deleted rows are kept.
+            batch_size: Rows per transaction.
+            delay: Seconds slept between batches.
+            archive: Whether to archive rather than delete.
+
+        Returns:
+            dict: Rows, seconds and rows per second of each step.
+        """
+        if retention_days is None:
+            retention_days = settings.PURGE_RETENTION_DAYS
+        batch_size = batch_size or settings.PURGE_BATCH_SIZE
+        if delay is None:
+            delay = settings.PURGE_BATCH_DELAY
+        if archive is None:
+            archive = settings.PURGE_ARCHIVE
+
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        item_archive = WishlistItemArchive if archive else None
+        customer_archive = CustomerArchive if archive else None
+
+        async def uncount(product_ids):
+            if settings.WISHLIST_POPULARITY_ENABLED:
+                await WishlistPopularity.apply(removed=product_ids)
+
+        stats = {
+            'cascade': await PurgeService._run_step(
+                'cascade',
+                PurgeService._cascade_query,
+                batch_size,
+                delay,
+                on_rows=uncount,
+            ),
+            'items': await PurgeService._run_step(
+                'items',
+                lambda limit: PurgeService._purge_query(
+                    WishlistItem, item_archive, cutoff, limit
+                ),
+                batch_size,
+                delay,
+            ),
+            'customers': await PurgeService._run_step(
+                'customers',
+                lambda limit: PurgeService._purge_query(
+                    Customer,
+                    customer_archive,
+                    cutoff,
+                    limit,
+                    ~select(WishlistItem.id)
+                    .where(WishlistItem.customer_id == Customer.id)
+                    .exists(),
+                ),
+                batch_size,
+                delay,
+            ),
+        }
+        return stats
+
+    @staticmethod
+    async def run():
+        """Purges every ``PURGE_INTERVAL`` seconds until cancelled.
+
+        Concurrent runs on several workers are safe, as batches skip rows
+        locked by each other.
+        """
+        while True:
+            try:
+                await PurgeService.purge()
+            except Exception:
+                logger.exception('Purge failed')
+
+            await asyncio.sleep(settings.PURGE_INTERVAL)
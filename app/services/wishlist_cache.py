@@ -0,0 +1,461 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import BUMP, batch, bump_version, get_redis
+from app.services.product_cache import PRODUCT_GENERATION_KEY
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# strong references to pending index repairs
+_repair_tasks = set()
+
+# answer of ``read_page`` for lists too large to be indexed
+TOO_LARGE = object()
+
+# every member has score 0, so the set is ordered by member; the empty
+# member sorts first and keeps the key alive for empty wishlists
+STORE_INDEX = BUMP + """
+local current = redis.call('GET', KEYS[3]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+if current == '' then
+    bump(KEYS[3])
+end
+redis.call('EXPIRE', KEYS[3], 2 * tonumber(ARGV[2]))
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('ZADD', KEYS[1], 0, '')
+for i = 4, #ARGV do
+    redis.call('ZADD', KEYS[1], 0, ARGV[i])
+end
+redis.call('HSET', KEYS[2], 'email', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+# marks a list larger than WISHLIST_CACHE_MAX_ITEMS, until the next write
+# drops the owner hash along with the missing index
+STORE_TOO_LARGE = """
+local current = redis.call('GET', KEYS[3]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[2], 'large', 1)
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+APPLY_CHANGES = BUMP + """
+bump(KEYS[3])
+redis.call('EXPIRE', KEYS[3], 2 * tonumber(ARGV[1]))
+local added = tonumber(ARGV[2])
+local removed = #ARGV - 4 - added
+-- counters are only adjusted when built, or they would start from zero,
+-- and only if built before the write began, or they may count it twice
+local built = tonumber(redis.call('HGET', KEYS[4], 'version'))
+local begun = tonumber(ARGV[4])
+if built and begun and built < begun then
+    redis.call('HINCRBY', KEYS[4], 'count', added - removed)
+    local modified = tonumber(redis.call('HGET', KEYS[4], 'modified')) or 0
+    if tonumber(ARGV[3]) > modified then
+        redis.call('HSET', KEYS[4], 'modified', ARGV[3])
+    end
+    redis.call('EXPIRE', KEYS[4], ARGV[1])
+else
+    redis.call('DEL', KEYS[4])
+end
+if redis.call('EXISTS', KEYS[1], KEYS[2]) < 2 then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 0
+end
+for i = 5, 4 + added do
+    redis.call('ZADD', KEYS[1], 0, ARGV[i])
+end
+for i = 5 + added, #ARGV do
+    redis.call('ZREM', KEYS[1], ARGV[i])
+end
+return 1
+"""
+
+# run before a write statement, so that a snapshot which may include the
+# write is either refused or stored with a version the write can recognise
+BEGIN_WRITE = BUMP + """
+local version = bump(KEYS[3])
+redis.call('EXPIRE', KEYS[3], 2 * tonumber(ARGV[1]))
+return version
+"""
+
+INVALIDATE = BUMP + """
+bump(KEYS[3])
+redis.call('EXPIRE', KEYS[3], 2 * tonumber(ARGV[1]))
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[4])
+"""
+
+STORE_SUMMARY = """
+local current = redis.call('GET', KEYS[3]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call(
+    'HSET', KEYS[4], 'email', ARGV[3], 'count', ARGV[4], 'modified', ARGV[5],
+    'version', ARGV[1]
+)
+redis.call('EXPIRE', KEYS[4], ARGV[2])
+return 1
+"""
+
+READ_VALIDATORS = """
+local email = redis.call('HGET', KEYS[2], 'email')
+local version = redis.call('GET', KEYS[3])
+if not email or not version then
+    return false
+end
+return {email, version}
+"""
+
+
+def keys(customer_id) -> list[str]:
+    """Returns the index, owner, version and summary keys of a customer.
+
+    The hash tag keeps the keys in the same cluster slot, as the scripts
+    touch them together.
+    """
+    try:
+        customer_id = uuid.UUID(str(customer_id))
+    except ValueError:
+        pass
+    prefix = f'wishlist:{{{customer_id}}}'
+    return [
+        f'{prefix}:items',
+        f'{prefix}:meta',
+        f'{prefix}:version',
+        f'{prefix}:summary',
+    ]
+
+
+def to_micros(moment: datetime) -> int:
+    """Returns a timestamp as epoch microseconds."""
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def member(created_at: datetime, item_id, product_id) -> str:
+    """Encodes an item so that member order matches ``(created_at, id)``.
+
+    Creation time is stored as zero-padded epoch microseconds and the
+    item id in its canonical form, which sorts like the Postgres uuid.
+    """
+    return f'{to_micros(created_at):016d}|{item_id}|{product_id}'
+
+
+def parse_member(raw: bytes) -> tuple[datetime, str, str]:
+    """Decodes a member built by ``member``."""
+    micros, item_id, product_id = raw.decode().split('|', 2)
+    return EPOCH + timedelta(microseconds=int(micros)), item_id, product_id
+
+
+class WishlistCache:
+    """Active product ids of each customer's wishlist, kept in Redis.
+
+    Each index is a sorted set of ``member()`` entries with the customer's
+    email (for the ACL check) in a companion hash. Writes update it after
+    commit and bump a version key, which also backs the listing ETag. A
+    lazy rebuild only stores a snapshot if the version did not change
+    while it was being read from the database, so a concurrent write
+    cannot be lost.
+
+    A summary hash keeps the item count and last change time, adjusted by
+    the same writes, so the count never needs the list itself. Unlike
+    the index, counters are not idempotent: each write bumps the version
+    before its statement runs (``begin_write``), and only adjusts a
+    summary built from an older version, dropping any other.
+    """
+
+    @staticmethod
+    async def version(customer_id) -> str:
+        """Returns the current version stamp ('' if never written)."""
+        value = await get_redis().get(keys(customer_id)[2])
+        return value.decode() if value else ''
+
+    @staticmethod
+    async def read_page(customer_id, limit: int, offset=0, after=None):
+        """Reads up to ``limit + 1`` items from the index.
+
+        Args:
+            customer_id: ID of the customer.
+            limit: Page size.
+            offset: Items to skip (offset mode).
+            after: ``(created_at, id)`` of the last item seen.
+
+        Returns:
+            A tuple with the customer email and a list of
+            ``(created_at, item_id, product_id)``, ``TOO_LARGE`` if the
+            list is paged by the database, or None if the index is not
+            built (or Redis is unavailable).
+        """
+        items_key, meta_key = keys(customer_id)[:2]
+        try:
+            async with batch(transaction=True) as pipe:
+                pipe.hmget(meta_key, 'email', 'large')
+                pipe.exists(items_key)
+                if after is not None:
+                    # past every member of the item, whatever its product
+                    start = b'(' + member(after[0], after[1], '').encode()
+                    pipe.zrangebylex(
+                        items_key, start + b'\xff', '+', 0, limit + 1
+                    )
+                else:
+                    pipe.zrange(items_key, offset + 1, offset + limit + 1)
+            (email, large), exists, members = pipe.results
+        except RedisError:
+            logger.warning('Wishlist index unavailable')
+            return None
+
+        if large:
+            return TOO_LARGE
+        if email is None or not exists:
+            return None
+        return email.decode(), [parse_member(m) for m in members]
+
+    @staticmethod
+    async def store(customer_id, email: str, items, version: str) -> bool:
+        """Builds the index from a database snapshot.
+
+        Args:
+            customer_id: ID of the customer.
+            email: Customer email.
+            items: Every active item as ``(created_at, item_id,
+                product_id)``.
+            version: Version read before the snapshot was taken.
+
+        Returns:
+            bool: False if a write happened meanwhile (nothing stored).
+        """
+        try:
+            stored = await get_redis().eval(
+                STORE_INDEX,
+                4,
+                *keys(customer_id),
+                version,
+                settings.WISHLIST_CACHE_TTL,
+                email,
+                *(member(*item) for item in items),
+            )
+        except RedisError:
+            logger.warning('Could not store wishlist index')
+            return False
+        return bool(stored)
+
+    @staticmethod
+    async def store_too_large(customer_id, version: str) -> bool:
+        """Records that a list has more than ``WISHLIST_CACHE_MAX_ITEMS``
+        items, so it is paged by the database without a rebuild attempt.
+
+        Args:
+            customer_id: ID of the customer.
+            version: Version read before the list was counted.
+
+        Returns:
+            bool: False if a write happened meanwhile (nothing stored).
+        """
+        try:
+            stored = await get_redis().eval(
+                STORE_TOO_LARGE,
+                4,
+                *keys(customer_id),
+                version,
+                settings.WISHLIST_CACHE_TTL,
+            )
+        except RedisError:
+            logger.warning('Could not store wishlist index')
+            return False
+        return bool(stored)
+
+    @staticmethod
+    async def begin_write(customer_id):
+        """Bumps the version before a write statement runs.
+
+        Returns:
+            str | None: The version to pass to ``apply``, or None if Redis
+            is unavailable (the summary is then dropped by ``apply``).
+        """
+        try:
+            # a replayed bump only moves the version further
+            version = await get_redis().eval(
+                BEGIN_WRITE,
+                4,
+                *keys(customer_id),
+                settings.WISHLIST_CACHE_TTL,
+            )
+        except RedisError:
+            logger.warning('Could not bump wishlist version')
+            return None
+        return str(version)
+
+    @staticmethod
+    async def apply(
+        customer_id, added=(), removed=(), modified=None, begun=None
+    ):
+        """Applies committed changes to the index and the summary and
+        bumps the version.
+
+        Args:
+            customer_id: ID of the customer.
+            added: Items made active, as ``(created_at, item_id,
+                product_id)``.
+            removed: Items soft-deleted, in the same form.
+            modified: When the changes were made.
+            begun: Version returned by ``begin_write`` for this write.
+        """
+        added = [member(*item) for item in added]
+        try:
+            # not idempotent, so never replayed
+            await get_redis(retry=False).eval(
+                APPLY_CHANGES,
+                4,
+                *keys(customer_id),
+                settings.WISHLIST_CACHE_TTL,
+                len(added),
+                to_micros(modified) if modified else 0,
+                begun or '',
+                *added,
+                *(member(*item) for item in removed),
+            )
+        except RedisError:
+            # the script may or may not have run, and its counters are not
+            # idempotent; dropping the index is
+            logger.exception('Could not update wishlist index')
+            await WishlistCache.invalidate(customer_id)
+
+    @staticmethod
+    async def _drop(customer_id):
+        await get_redis().eval(
+            INVALIDATE,
+            4,
+            *keys(customer_id),
+            settings.WISHLIST_CACHE_TTL,
+        )
+
+    @staticmethod
+    async def _repair(customer_id):
+        """Retries dropping an index with exponential backoff."""
+        delay = settings.WISHLIST_CACHE_REPAIR_DELAY
+        for _ in range(settings.WISHLIST_CACHE_REPAIR_ATTEMPTS):
+            await asyncio.sleep(delay)
+            try:
+                await WishlistCache._drop(customer_id)
+                return
+            except RedisError:
+                delay *= 2
+        logger.error(
+            'Wishlist index may be stale',
+            extra={'customer_id': str(customer_id)},
+        )
+
+    @staticmethod
+    async def invalidate(customer_id):
+        """Drops the index, e.g. after the customer changed or was deleted.
+
+        A failed drop is retried in the background, so an index that no
+        longer matches the database does not keep being served until its
+        TTL expires.
+        """
+        try:
+            await WishlistCache._drop(customer_id)
+        except RedisError:
+            logger.exception('Could not drop wishlist index')
+            task = asyncio.create_task(WishlistCache._repair(customer_id))
+            _repair_tasks.add(task)
+            task.add_done_callback(_repair_tasks.discard)
+
+    @staticmethod
+    async def validators(customer_id):
+        """Reads what a conditional request needs, in one round trip.
+
+        Returns:
+            A tuple with the customer email, the wishlist version and the
+            product generation, or None if the index is not built (or
+            Redis is unavailable).
+        """
+        try:
+            async with batch() as pipe:
+                pipe.eval(READ_VALIDATORS, 4, *keys(customer_id))
+                pipe.get(PRODUCT_GENERATION_KEY)
+            found, generation = pipe.results
+            if found and generation is None:
+                generation = await bump_version(PRODUCT_GENERATION_KEY)
+        except RedisError:
+            logger.warning('Wishlist index unavailable')
+            return None
+
+        if not found:
+            return None
+        email, version = (value.decode() for value in found)
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return email, version, str(generation)
+
+    @staticmethod
+    async def read_summary(customer_id):
+        """Reads the item count and last change time.
+
+        Returns:
+            A tuple with the customer email, the number of active items and
+            the last change time (None if never changed), or None if the
+            summary is not built (or Redis is unavailable).
+        """
+        try:
+            found = await get_redis().hmget(
+                keys(customer_id)[3], 'email', 'count', 'modified'
+            )
+        except RedisError:
+            logger.warning('Wishlist summary unavailable')
+            return None
+
+        email, count, modified = found
+        if email is None or count is None:
+            return None
+        modified = int(modified) if modified else 0
+        return (
+            email.decode(),
+            int(count),
+            EPOCH + timedelta(microseconds=modified) if modified else None,
+        )
+
+    @staticmethod
+    async def store_summary(
+        customer_id, email: str, count: int, modified, version: str
+    ) -> bool:
+        """Builds the summary from a database snapshot.
+
+        Args:
+            customer_id: ID of the customer.
+            email: Customer email.
+            count: Number of active items.
+            modified: Last change time, or None.
+            version: Version read before the snapshot was taken.
+
+        Returns:
+            bool: False if a write happened meanwhile (nothing stored).
+        """
+        try:
+            stored = await get_redis().eval(
+                STORE_SUMMARY,
+                4,
+                *keys(customer_id),
+                version,
+                settings.WISHLIST_CACHE_TTL,
+                email,
+                count,
+                to_micros(modified) if modified else 0,
+            )
+        except RedisError:
+            logger.warning('Could not store wishlist summary')
+            return False
+        return bool(stored)
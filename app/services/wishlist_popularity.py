@@ -0,0 +1,139 @@
+import logging
+import time
+from sqlalchemy import func, select
+from redis.exceptions import RedisError
+from app.core.database import AsyncSessionLocal
+from app.core.redis import batch, get_redis
+from app.models import Customer, WishlistItem
+
+logger = logging.getLogger(__name__)
+
+# active wishlist items per product; both keys share a hash tag so the
+# rebuilt set can replace the live one with RENAME
+POPULARITY_KEY = 'wishlist:{popularity}'
+REBUILD_KEY = 'wishlist:{popularity}:rebuild'
+
+
+class WishlistPopularity:
+    """How many active wishlist items each product has, kept in a Redis
+    sorted set.
+
+    Wishlist writes adjust it after commit, so reading the most
+    wishlisted products never groups the ``wishlist_item`` table. Changes
+    lost meanwhile (Redis unavailable, customers hard-deleted) are fixed
+    by ``rebuild``.
+    """
+
+    @staticmethod
+    async def apply(added=(), removed=()):
+        """Counts committed additions and removals.
+
+        Args:
+            added: Product ids made active.
+            removed: Product ids soft-deleted.
+        """
+        try:
+            async with batch(retry=False) as pipe:
+                for product_id in added:
+                    pipe.zincrby(POPULARITY_KEY, 1, product_id)
+                for product_id in removed:
+                    pipe.zincrby(POPULARITY_KEY, -1, product_id)
+                if removed:
+                    pipe.zremrangebyscore(POPULARITY_KEY, '-inf', 0)
+        except RedisError:
+            logger.exception('Could not update wishlist popularity')
+
+    @staticmethod
+    async def top(limit: int) -> list[tuple[str, int]]:
+        """Returns the most wishlisted products.
+
+        Args:
+            limit: Maximum number of products.
+
+        Returns:
+            list[tuple[str, int]]: Product ids and counts, most wishlisted
+            first.
+        """
+        ranked = await get_redis().zrevrange(
+            POPULARITY_KEY, 0, limit - 1, withscores=True
+        )
+        return [(pid.decode(), int(score)) for pid, score in ranked]
+
+    @staticmethod
+    async def counts(product_ids) -> dict[str, int]:
+        """Returns how many active wishlist items each product has.
+
+        Args:
+            product_ids: Identifiers of the products.
+
+        Returns:
+            dict[str, int]: Count per product id (0 if never wishlisted).
+        """
+        product_ids = [str(pid) for pid in product_ids]
+        if not product_ids:
+            return {}
+        scores = await get_redis().zmscore(POPULARITY_KEY, product_ids)
+        return {
+            pid: int(score or 0) for pid, score in zip(product_ids, scores)
+        }
+
+    @staticmethod
+    async def rebuild(chunk_size: int = 1000) -> dict:
+        """Recounts the sorted set from ``wishlist_item``.
+
+        Customers are walked in primary key order, ``chunk_size`` at a
+        time, each chunk counted in its own short transaction through the
+        active-items index, so no statement groups the whole table. The
+        counts go to a separate key that replaces the live one at the end;
+        changes made to already counted customers while it runs are picked
+        up by the next rebuild.
+
+        Args:
+            chunk_size: Customers counted per statement.
+
+        Returns:
+            dict: Counters of customers, items and products, and elapsed
+            seconds.
+        """
+        stats = {'customers': 0, 'items': 0}
+        started = time.perf_counter()
+        client = get_redis()
+        await client.delete(REBUILD_KEY)
+
+        last = None
+        while True:
+            customers = select(Customer.id).order_by(Customer.id)
+            if last is not None:
+                customers = customers.where(Customer.id > last)
+            async with AsyncSessionLocal() as session:
+                ids = (
+                    await session.execute(customers.limit(chunk_size))
+                ).scalars().all()
+                if not ids:
+                    break
+                counts = (
+                    await session.execute(
+                        select(WishlistItem.product_id, func.count())
+                        .where(
+                            WishlistItem.customer_id.in_(ids),
+                            WishlistItem.deleted_at.is_(None),
+                        )
+                        .group_by(WishlistItem.product_id)
+                    )
+                ).all()
+
+            async with batch(retry=False) as pipe:
+                for product_id, count in counts:
+                    pipe.zincrby(REBUILD_KEY, count, product_id)
+            stats['customers'] += len(ids)
+            stats['items'] += sum(count for _, count in counts)
+            last = ids[-1]
+
+        if stats['items']:
+            await client.rename(REBUILD_KEY, POPULARITY_KEY)
+        else:
+            await client.delete(POPULARITY_KEY)
+        stats['products'] = await client.zcard(POPULARITY_KEY)
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        logger.info('Wishlist popularity rebuilt', extra=dict(stats))
+        return stats
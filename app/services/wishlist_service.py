@@ -1,83 +1,782 @@
-from sqlalchemy import select
+import base64
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import (
+    String,
+    and_,
+    func,
+    literal,
+    select,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_cache import make_etag
 from app.models import WishlistItem, Customer
+from app.services.customer_identity import (
+    CustomerIdentity,
+    CustomerIdentityCache,
+)
 from app.services.product_service import ProductService
+from app.services.wishlist_cache import TOO_LARGE, WishlistCache
+from app.services.wishlist_popularity import WishlistPopularity
 from fastapi import HTTPException
-from datetime import datetime, timezone
+
+# returned by write statements to keep the Redis index in sync
+CHANGED_COLUMNS = (
+    WishlistItem.id,
+    WishlistItem.created_at,
+    WishlistItem.product_id,
+    WishlistItem.updated_at,
+)
+
+JSON_MEDIA_TYPE = 'application/json'
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# product lookup source -> key of the ``source`` listing
+SOURCES_MAP = {
+    'memory': 'from_memory',
+    'cache_short': 'from_cache_short',
+    'cache_long': 'from_cache_long',
+    'cache_stale': 'from_cache_stale',
+    'api': 'from_api',
+    'not_found': 'not_found',
+}
+
+
+def encode_cursor(created_at: datetime, item_id) -> str:
+    """Builds the opaque cursor pointing after a wishlist item."""
+    raw = json.dumps([created_at.isoformat(), str(item_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Parses a cursor built by ``encode_cursor``.
+
+    Returns:
+        tuple: The ``(created_at, id)`` key of the last item seen.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+        # compared with timestamptz values, so it needs an offset
+        if created_at.tzinfo is None:
+            raise ValueError(created_at)
+        return created_at, uuid.UUID(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, 'Invalid cursor')
 
 
 class WishlistService:
     @staticmethod
-    async def list_items(session, customer_id, current_user, limit, offset):
-        """Returns the customer's wishlist.
+    def _page_query(customer_id, limit, offset=0, after=None):
+        """Active items of a customer ordered by ``(created_at, id)``.
+
+        One extra row is fetched to tell whether there is a next page.
+
+        Args:
+            customer_id: ID of the customer.
+            limit: Page size.
+            offset: Items to skip (offset mode).
+            after: ``(created_at, id)`` of the last item seen (keyset
+                mode), served by the ix_wishlist_item_customer_created
+                index regardless of depth.
+        """
+        query = (
+            select(
+                WishlistItem.id,
+                WishlistItem.created_at,
+                WishlistItem.product_id,
+            )
+            .where(
+                WishlistItem.customer_id == customer_id,
+                WishlistItem.deleted_at.is_(None),
+            )
+            .order_by(WishlistItem.created_at, WishlistItem.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(WishlistItem.created_at, WishlistItem.id)
+                > tuple_(*after)
+            )
+        elif offset:
+            query = query.offset(offset)
+        return query
+
+    @staticmethod
+    def _customer_cte(customer_id):
+        """Active customer, for combining the existence and ACL checks with
+        the wishlist statement in a single round trip."""
+        return (
+            select(Customer.id, Customer.email)
+            .where(Customer.id == customer_id, Customer.deleted_at.is_(None))
+            .cte('cust')
+        )
+
+    @staticmethod
+    def _acl_clause(cust, current_user):
+        """SQL condition granting access to the customer's list."""
+        if 'CUSTOMER' in current_user['roles']:
+            return cust.c.email == current_user['email']
+        return true()
+
+    @staticmethod
+    def _authorize(email, current_user, message):
+        """Applies the customer checks to the fetched customer email.
+
+        Raises:
+            HTTPException: 400 if the customer does not exist, 403 if a
+                customer accesses another customer's list.
+        """
+        if email is None:
+            raise HTTPException(400, 'Customer does not exist')
+
+        # ACL
+        roles = current_user['roles']
+        if 'CUSTOMER' in roles and current_user['email'] != email:
+            raise HTTPException(403, message)
+
+    @staticmethod
+    async def _check_identity(customer_id, current_user, message):
+        """Applies ``_authorize`` to the cached customer identity, so
+        denied requests are rejected without a database round trip.
+
+        Unknown identities are left to the statement that follows, which
+        checks the customer anyway.
+
+        Returns:
+            The generation to pass to ``_remember_identity`` when the
+            identity is not cached, otherwise None.
+        """
+        if not settings.CUSTOMER_IDENTITY_CACHE_ENABLED:
+            return None
+
+        identity, generation = await CustomerIdentityCache.lookup(
+            customer_id
+        )
+        if identity is not None:
+            WishlistService._authorize(
+                None if identity.deleted else identity.email,
+                current_user,
+                message,
+            )
+        return generation
+
+    @staticmethod
+    async def _remember_identity(customer_id, email, generation):
+        """Caches the identity of a customer a statement found active,
+        unless it was invalidated since ``_check_identity``."""
+        if email is not None:
+            await CustomerIdentityCache.store(
+                customer_id,
+                CustomerIdentity(str(customer_id), email, False),
+                generation,
+            )
+
+    @staticmethod
+    async def _customer_email(session, customer_id):
+        """Returns the active customer's email, or None if the customer
+        does not exist."""
+        if settings.CUSTOMER_IDENTITY_CACHE_ENABLED:
+            identity = await CustomerIdentityCache.load(session, customer_id)
+            if identity is None or identity.deleted:
+                return None
+            return identity.email
+
+        cust = WishlistService._customer_cte(customer_id)
+        return (
+            await session.execute(select(cust.c.email))
+        ).scalar_one_or_none()
+
+    @staticmethod
+    async def _query_page(session, customer_id, limit, offset, after):
+        """Reads the customer email and a page of items in one statement.
+
+        Returns:
+            A tuple with the email (None if the customer does not exist)
+            and up to ``limit + 1`` ``(created_at, id, product_id)``.
+        """
+        cust = WishlistService._customer_cte(customer_id)
+        page = WishlistService._page_query(
+            customer_id, limit, offset, after
+        ).cte('page')
+        # one row per item, or a single row with a NULL product_id when
+        # the list page is empty; no row at all if the customer is missing
+        query = (
+            select(
+                cust.c.email,
+                page.c.product_id,
+                page.c.created_at,
+                page.c.id,
+            )
+            .select_from(cust.outerjoin(page, true()))
+            .order_by(page.c.created_at, page.c.id)
+        )
+        result = (await session.execute(query)).all()
+        if not result:
+            return None, []
+        return result[0].email, [
+            (row.created_at, row.id, row.product_id)
+            for row in result
+            if row.product_id is not None
+        ]
+
+    @staticmethod
+    async def _load_page(session, customer_id, limit, offset, after):
+        """Reads a page from the database, rebuilding the Redis index.
+
+        The whole active list is read once (up to
+        ``WISHLIST_CACHE_MAX_ITEMS``) and stored in the index; larger
+        lists are marked as such, so they are paged by the database
+        without reading the snapshot again until the next write.
+
+        Returns:
+            Same as ``_query_page``.
+        """
+        if not settings.WISHLIST_CACHE_ENABLED:
+            return await WishlistService._query_page(
+                session, customer_id, limit, offset, after
+            )
+
+        try:
+            version = await WishlistCache.version(customer_id)
+        except RedisError:
+            return await WishlistService._query_page(
+                session, customer_id, limit, offset, after
+            )
+
+        max_items = settings.WISHLIST_CACHE_MAX_ITEMS
+        email, items = await WishlistService._query_page(
+            session, customer_id, max_items, 0, None
+        )
+        if email is None:
+            return None, []
+        if len(items) > max_items:
+            await WishlistCache.store_too_large(customer_id, version)
+            return await WishlistService._query_page(
+                session, customer_id, limit, offset, after
+            )
+
+        await WishlistCache.store(customer_id, email, items, version)
+
+        if after is not None:
+            items = [item for item in items if item[:2] > after]
+        else:
+            items = items[offset:]
+        return email, items[: limit + 1]
+
+    @staticmethod
+    async def list_etag(
+        customer_id,
+        current_user,
+        limit,
+        offset,
+        cursor=None,
+        media_type=JSON_MEDIA_TYPE,
+    ):
+        """Returns the ETag of a wishlist page without touching the
+        database or the product caches.
+
+        It changes whenever the customer's list is written (wishlist
+        version) or any cached product content changes (product
+        generation).
 
         Args:
             customer_id: ID of the customer.
+            current_user: Authenticated user.
             limit: Maximum number of items to return.
             offset: Pagination offset.
-            session: Database session.
-            current_user: Authenticated user.
+            cursor: Keyset cursor.
+            media_type: Representation of the page, as each one gets its
+                own ETag.
 
         Returns:
-            Paginated list of wishlist items.
+            str | None: The ETag, or None when it cannot be derived cheaply
+            (the Redis index is not built).
+
+        Raises:
+            HTTPException: 403 if a customer requests another customer's
+                list.
         """
-        customer_query = select(Customer).where(
-            Customer.id == customer_id, Customer.deleted_at.is_(None)
+        if not settings.WISHLIST_CACHE_ENABLED:
+            return None
+
+        found = await WishlistCache.validators(customer_id)
+        if found is None:
+            return None
+
+        email, version, generation = found
+        WishlistService._authorize(
+            email, current_user, 'Customers can only access their own list'
+        )
+        return make_etag(
+            customer_id,
+            version,
+            generation,
+            limit,
+            0 if cursor else offset,
+            cursor,
+            media_type,
         )
-        query_result = await session.execute(customer_query)
-        customer = query_result.scalar_one_or_none()
 
-        if not customer:
-            raise HTTPException(400, 'Customer does not exist')
+    @staticmethod
+    async def _read_page(
+        session, customer_id, current_user, limit, offset, cursor
+    ):
+        """Reads the product ids of a page, from the index or the database.
 
-        # ACL
-        if 'CUSTOMER' in current_user['roles'] and current_user['email'] != customer.email:
-            raise HTTPException(
-                403, 'Customers can only access their own list'
-            )
+        Returns:
+            A tuple with the product ids of the page and the cursor of the
+            next page (None on the last page).
 
-        wishlist_item_query = (
-            select(WishlistItem.product_id)
-            .where(
-                WishlistItem.customer_id == customer_id,
-                WishlistItem.deleted_at.is_(None),
+        Raises:
+            HTTPException: 403 if a customer requests another customer's
+                list.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        cached = None
+        generation = None
+        if settings.WISHLIST_CACHE_ENABLED:
+            cached = await WishlistCache.read_page(
+                customer_id, limit, offset, after
+            )
+        if cached is None or cached is TOO_LARGE:
+            generation = await WishlistService._check_identity(
+                customer_id,
+                current_user,
+                'Customers can only access their own list',
             )
-            .offset(offset)
-            .limit(limit)
+            load = (
+                WishlistService._query_page
+                if cached is TOO_LARGE
+                else WishlistService._load_page
+            )
+            cached = await load(session, customer_id, limit, offset, after)
+        email, page_rows = cached
+
+        WishlistService._authorize(
+            email, current_user, 'Customers can only access their own list'
+        )
+        await WishlistService._remember_identity(
+            customer_id, email, generation
+        )
+        next_cursor = None
+        if len(page_rows) > limit:
+            page_rows = page_rows[:limit]
+            created_at, item_id, _ = page_rows[-1]
+            next_cursor = encode_cursor(created_at, item_id)
+        return [product_id for _, _, product_id in page_rows], next_cursor
+
+    @staticmethod
+    async def list_items(
+        session, customer_id, current_user, limit, offset, cursor=None
+    ):
+        """Returns the customer's wishlist.
+
+        Items are ordered by creation. When ``cursor`` is given, the page
+        starts right after the item it points to and ``offset`` is ignored.
+
+        Args:
+            customer_id: ID of the customer.
+            limit: Maximum number of items to return.
+            offset: Pagination offset.
+            session: Database session.
+            current_user: Authenticated user.
+            cursor: ``next_cursor`` returned with the previous page.
+
+        Returns:
+            Paginated list of wishlist items.
+        """
+        rows, next_cursor = await WishlistService._read_page(
+            session, customer_id, current_user, limit, offset, cursor
         )
-        rows = (await session.execute(wishlist_item_query)).scalars().all()
 
         items = []
-        sources = {
-            'from_cache_short': [],
-            'from_cache_long': [],
-            'from_api': [],
-            'not_found': [],
-        }
+        sources = {name: [] for name in SOURCES_MAP.values()}
+
+        products = await ProductService.get_products(rows)
 
         for pid in rows:
-            pdata, src = await ProductService.get_product(str(pid))
+            pdata, src = products[str(pid)]
 
             if pdata:
                 items.append(pdata)
 
-            sources_map = {
-                'cache_short': 'from_cache_short',
-                'cache_long': 'from_cache_long',
-                'api': 'from_api',
-                'not_found': 'not_found',
-            }
-            sources[sources_map[src]].append(pid)
+            sources[SOURCES_MAP[src]].append(pid)
 
         return {
             'items': items,
             'source': sources,
             'pagination': {
                 'limit': limit,
-                'offset': offset,
+                'offset': 0 if cursor else offset,
                 'count': len(items),
+                'next_cursor': next_cursor,
             },
         }
 
+    @staticmethod
+    async def stream_items(
+        session, customer_id, current_user, limit, offset, cursor=None
+    ):
+        """Returns the customer's wishlist as a stream of JSON lines.
+
+        The page is read and authorized up front, so errors are raised
+        before the response starts. Each product is then written as soon
+        as it resolves, in completion order, as ``{"type": "item",
+        "position": ..., "product_id": ..., "source": ..., "product":
+        ...}`` (``position`` is its index in the page and ``product`` is
+        null when not found). A final ``{"type": "summary"}`` record
+        carries ``source`` and ``pagination`` as in ``list_items``.
+
+        Args:
+            customer_id: ID of the customer.
+            limit: Maximum number of items to return.
+            offset: Pagination offset.
+            session: Database session.
+            current_user: Authenticated user.
+            cursor: ``next_cursor`` returned with the previous page.
+
+        Returns:
+            An async iterator of newline-terminated JSON strings.
+        """
+        rows, next_cursor = await WishlistService._read_page(
+            session, customer_id, current_user, limit, offset, cursor
+        )
+        positions = {}
+        for position, pid in enumerate(rows):
+            positions.setdefault(str(pid), []).append(position)
+
+        async def lines():
+            sources = {name: [] for name in SOURCES_MAP.values()}
+            count = 0
+            async for pid, (pdata, src) in ProductService.iter_products(
+                rows
+            ):
+                for position in positions[pid]:
+                    sources[SOURCES_MAP[src]].append(pid)
+                    count += bool(pdata)
+                    yield json.dumps(
+                        {
+                            'type': 'item',
+                            'position': position,
+                            'product_id': pid,
+                            'source': src,
+                            'product': pdata,
+                        }
+                    ) + '\n'
+            yield json.dumps(
+                {
+                    'type': 'summary',
+                    'source': sources,
+                    'pagination': {
+                        'limit': limit,
+                        'offset': 0 if cursor else offset,
+                        'count': count,
+                        'next_cursor': next_cursor,
+                    },
+                }
+            ) + '\n'
+
+        return lines()
+
+    @staticmethod
+    async def _query_summary(session, customer_id):
+        """Counts the active items of a customer in one statement.
+
+        The last change time covers soft-deleted items too, like the
+        incremental updates, so a removal still counts as a change.
+
+        Returns:
+            A tuple with the email (None if the customer does not exist),
+            the number of active items and their last change time.
+        """
+        cust = WishlistService._customer_cte(customer_id)
+        query = (
+            select(
+                cust.c.email,
+                func.count(WishlistItem.id)
+                .filter(WishlistItem.deleted_at.is_(None))
+                .label('count'),
+                func.max(WishlistItem.updated_at).label('modified'),
+            )
+            .select_from(
+                cust.outerjoin(
+                    WishlistItem,
+                    and_(
+                        WishlistItem.customer_id == customer_id,
+                        WishlistItem.customer_id == cust.c.id,
+                    ),
+                )
+            )
+            .group_by(cust.c.email)
+        )
+        row = (await session.execute(query)).one_or_none()
+        if row is None:
+            return None, 0, None
+        return row.email, row.count, row.modified
+
+    @staticmethod
+    async def summary(session, customer_id, current_user):
+        """Returns how many items a customer has and when the list last
+        changed.
+
+        Served from counters that writes keep up to date in Redis, without
+        reading the list or resolving products. A missing summary is
+        rebuilt from ``wishlist_item``, guarded by the wishlist version
+        like the index.
+
+        Args:
+            session: Database session.
+            customer_id: ID of the customer.
+            current_user: Authenticated user.
+
+        Returns:
+            dict: ``count`` and ``last_modified``.
+
+        Raises:
+            HTTPException: 400 if the customer does not exist, 403 if a
+                customer requests another customer's summary.
+        """
+        found = None
+        version = None
+        generation = None
+        if settings.WISHLIST_CACHE_ENABLED:
+            found = await WishlistCache.read_summary(customer_id)
+            if found is None:
+                try:
+                    version = await WishlistCache.version(customer_id)
+                except RedisError:
+                    pass
+        if found is None:
+            generation = await WishlistService._check_identity(
+                customer_id,
+                current_user,
+                'Customers can only access their own list',
+            )
+            found = await WishlistService._query_summary(
+                session, customer_id
+            )
+            if found[0] is not None and version is not None:
+                await WishlistCache.store_summary(
+                    customer_id, *found, version
+                )
+        email, count, modified = found
+
+        WishlistService._authorize(
+            email, current_user, 'Customers can only access their own list'
+        )
+        await WishlistService._remember_identity(
+            customer_id, email, generation
+        )
+        return {'count': count, 'last_modified': modified}
+
+    @staticmethod
+    async def customers_with_product(product_id, chunk_size: int = 1000):
+        """Streams the active customers holding a product in their list.
+
+        Rows come from a server-side cursor, ``chunk_size`` at a time,
+        along ``ix_wishlist_item_product_customer``, so memory stays
+        bounded however many customers hold the product. The read runs in
+        its own session for as long as the consumer iterates.
+
+        Args:
+            product_id: Product identifier.
+            chunk_size: Rows fetched per round trip.
+
+        Yields:
+            Lists of up to ``chunk_size`` ``(customer_id, email)`` tuples,
+            ordered by customer id.
+        """
+        query = (
+            select(Customer.id, Customer.email)
+            .join(WishlistItem, WishlistItem.customer_id == Customer.id)
+            .where(
+                WishlistItem.product_id == str(product_id),
+                WishlistItem.deleted_at.is_(None),
+                Customer.deleted_at.is_(None),
+            )
+            .order_by(WishlistItem.customer_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield [(row.id, row.email) for row in rows]
+
+    @staticmethod
+    def _add_ctes(customer_id, cust, acl, product_ids):
+        """Statements adding products to a customer's list atomically.
+
+        A product removed before is revived: its most recently deleted row
+        is reactivated instead of inserting a new one, so remove/re-add
+        cycles do not grow the table. The remaining products are inserted
+        with ``ON CONFLICT DO NOTHING`` against the partial unique index
+        ``uq_customer_product_active``, so products already in the list
+        are skipped without an error.
+
+        Args:
+            customer_id: ID of the customer, repeated as a literal so
+                that the partitioned table is pruned to its partition.
+            cust: Customer CTE.
+            acl: ACL condition over ``cust``.
+            product_ids: Distinct product identifiers.
+
+        Returns:
+            tuple: The ``revived`` and ``ins`` CTEs, each returning the
+            rows it made active.
+        """
+        ids = literal(list(product_ids), ARRAY(String))
+        active = aliased(WishlistItem)
+        removed = aliased(WishlistItem)
+        newer = aliased(WishlistItem)
+        latest_removed = select(removed.id).where(
+            removed.customer_id == customer_id,
+            removed.customer_id == cust.c.id,
+            removed.product_id == func.any(ids),
+            removed.id
+            == select(newer.id)
+            .where(
+                newer.customer_id == removed.customer_id,
+                newer.product_id == removed.product_id,
+                newer.deleted_at.isnot(None),
+            )
+            .order_by(newer.deleted_at.desc())
+            .limit(1)
+            .scalar_subquery(),
+            ~select(active.id)
+            .where(
+                active.customer_id == removed.customer_id,
+                active.product_id == removed.product_id,
+                active.deleted_at.is_(None),
+            )
+            .exists(),
+        )
+        revived = (
+            update(WishlistItem)
+            .where(
+                # no index leads with id alone once the table is partitioned
+                WishlistItem.customer_id == customer_id,
+                WishlistItem.id.in_(latest_removed),
+                # rechecked on the locked row under concurrent revivals
+                WishlistItem.deleted_at.isnot(None),
+                acl,
+            )
+            .values(deleted_at=None, created_at=func.now())
+            .returning(*CHANGED_COLUMNS)
+            .cte('revived')
+        )
+
+        new_ids = func.unnest(ids).table_valued('product_id')
+        inserted = (
+            pg_insert(WishlistItem)
+            .from_select(
+                ['id', 'customer_id', 'product_id'],
+                select(
+                    func.gen_random_uuid(), cust.c.id, new_ids.c.product_id
+                ).where(
+                    acl,
+                    # both CTEs see the same snapshot, so skip revived ones
+                    new_ids.c.product_id.not_in(
+                        select(revived.c.product_id)
+                    ),
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=['customer_id', 'product_id'],
+                index_where=WishlistItem.deleted_at.is_(None),
+            )
+            .returning(*CHANGED_COLUMNS)
+            .cte('ins')
+        )
+        return revived, inserted
+
+    @staticmethod
+    def _changes_query(cust, added=(), removed=()):
+        """Selects the customer email with the rows changed by write CTEs.
+
+        There is one row per changed item, a single row with NULL change
+        columns when nothing changed, and no row at all if the customer
+        does not exist.
+
+        Args:
+            cust: Customer CTE.
+            added: CTEs returning the items they made active.
+            removed: CTEs returning the items they soft-deleted.
+        """
+        parts = [
+            select(
+                literal(action).label('action'),
+                cte.c.id,
+                cte.c.created_at,
+                cte.c.product_id,
+                cte.c.updated_at,
+            )
+            for action, ctes in (('add', added), ('remove', removed))
+            for cte in ctes
+        ]
+        changes = union_all(*parts).subquery('changes')
+        return select(
+            cust.c.email,
+            changes.c.action,
+            changes.c.id,
+            changes.c.created_at,
+            changes.c.product_id,
+            changes.c.updated_at,
+        ).select_from(cust.outerjoin(changes, true()))
+
+    @staticmethod
+    async def _begin_write(customer_id):
+        """Bumps the wishlist version before a write statement runs, see
+        ``WishlistCache.begin_write``."""
+        if not settings.WISHLIST_CACHE_ENABLED:
+            return None
+        return await WishlistCache.begin_write(customer_id)
+
+    @staticmethod
+    async def _sync_cache(customer_id, rows, generation=None, begun=None):
+        """Writes committed changes through to the Redis index, summary
+        and popularity counters, and the customer identity cache."""
+        if rows:
+            await WishlistService._remember_identity(
+                customer_id, rows[0].email, generation
+            )
+        changed = [row for row in rows if row.action is not None]
+        if not changed:
+            return
+
+        changes = {'add': [], 'remove': []}
+        for row in changed:
+            changes[row.action].append(
+                (row.created_at, row.id, row.product_id)
+            )
+        if settings.WISHLIST_POPULARITY_ENABLED:
+            await WishlistPopularity.apply(
+                [item[2] for item in changes['add']],
+                [item[2] for item in changes['remove']],
+            )
+        if settings.WISHLIST_CACHE_ENABLED:
+            await WishlistCache.apply(
+                customer_id,
+                changes['add'],
+                changes['remove'],
+                max(row.updated_at for row in changed),
+                begun,
+            )
+
     @staticmethod
     async def add_product(session, customer_id, product_id, current_user):
         """Adds a product to the wishlist.
@@ -91,40 +790,47 @@ class WishlistService:
         Returns:
             Created wishlist item.
         """
-        customer_query = select(Customer).where(
-            Customer.id == customer_id, Customer.deleted_at.is_(None)
+        message = 'Customers can only modify their own list'
+        generation = await WishlistService._check_identity(
+            customer_id, current_user, message
         )
-        query_result = await session.execute(customer_query)
-        customer = query_result.scalar_one_or_none()
-
-        if not customer:
-            raise HTTPException(400, 'Customer does not exist')
-
-        if 'CUSTOMER' in current_user['roles'] and current_user['email'] != customer.email:
-            raise HTTPException(
-                403, 'Customers can only modify their own list'
-            )
 
         data, src = await ProductService.get_product(product_id)
         if data is None:
+            # keep reporting customer errors first, as before
+            email = await WishlistService._customer_email(
+                session, customer_id
+            )
+            WishlistService._authorize(email, current_user, message)
             raise HTTPException(400, 'Product does not exist')
 
-        item = WishlistItem(customer_id=customer_id, product_id=product_id)
-        session.add(item)
-
-        from sqlalchemy.exc import IntegrityError
+        cust = WishlistService._customer_cte(customer_id)
+        acl = WishlistService._acl_clause(cust, current_user)
+        revived, inserted = WishlistService._add_ctes(
+            customer_id, cust, acl, [str(product_id)]
+        )
+        query = WishlistService._changes_query(cust, added=(revived, inserted))
 
+        begun = await WishlistService._begin_write(customer_id)
         try:
-            await session.commit()
-        except IntegrityError as e:
-            await session.rollback()
-            if 'UniqueViolationError' in str(
-                e
-            ):   # if isinstance(e.orig, asyncpg.exceptions.UniqueViolationError):
+            rows = (await session.execute(query)).all()
+            WishlistService._authorize(
+                rows[0].email if rows else None, current_user, message
+            )
+            if rows[0].action is None:
                 raise HTTPException(409, 'Product already in wishlist')
+        except HTTPException:
+            await session.rollback()
             raise
+        except IntegrityError:
+            # only when racing with a concurrent add of the same product
+            await session.rollback()
+            raise HTTPException(409, 'Product already in wishlist')
 
-        await session.refresh(item)
+        await session.commit()
+        await WishlistService._sync_cache(
+            customer_id, rows, generation, begun
+        )
         return {'product_id': product_id, 'added': True}
 
     @staticmethod
@@ -139,31 +845,151 @@ class WishlistService:
 
         Returns: None
         """
-        customer_query = select(Customer).where(
-            Customer.id == customer_id, Customer.deleted_at.is_(None)
+        generation = await WishlistService._check_identity(
+            customer_id,
+            current_user,
+            'Customers can only modify their own list',
         )
-        query_result = await session.execute(customer_query)
-        customer = query_result.scalar_one_or_none()
 
-        if not customer:
-            raise HTTPException(400, 'Customer does not exist')
+        cust = WishlistService._customer_cte(customer_id)
+        deleted = (
+            update(WishlistItem)
+            .where(
+                WishlistItem.customer_id == customer_id,
+                WishlistItem.customer_id == cust.c.id,
+                WishlistItem.product_id == str(product_id),
+                WishlistItem.deleted_at.is_(None),
+                WishlistService._acl_clause(cust, current_user),
+            )
+            .values(deleted_at=func.now())
+            .returning(*CHANGED_COLUMNS)
+            .cte('upd')
+        )
+        query = WishlistService._changes_query(cust, removed=(deleted,))
+        begun = await WishlistService._begin_write(customer_id)
+        rows = (await session.execute(query)).all()
 
-        if 'CUSTOMER' in current_user['roles'] and current_user['email'] != customer.email:
-            raise HTTPException(
-                403, 'Customers can only modify their own list'
+        try:
+            WishlistService._authorize(
+                rows[0].email if rows else None,
+                current_user,
+                'Customers can only modify their own list',
             )
+            if rows[0].action is None:
+                raise HTTPException(404, 'Product not found')
+        except HTTPException:
+            await session.rollback()
+            raise
+
+        await session.commit()
+        await WishlistService._sync_cache(
+            customer_id, rows, generation, begun
+        )
+
+    @staticmethod
+    async def bulk_update(session, customer_id, add, remove, current_user):
+        """Adds and removes many products in a single statement.
+
+        Products to add are validated with one batched cache lookup. The
+        valid ones are revived or written with a multi-row ``INSERT ... ON
+        CONFLICT DO NOTHING`` (see ``_add_ctes``), and removals with one
+        bulk soft-delete.
+
+        Args:
+            session: Database session.
+            customer_id: ID of the customer.
+            add: Product identifiers to add.
+            remove: Product identifiers to remove.
+            current_user: Authenticated user.
+
+        Returns:
+            Per-item status: ``added``, ``already_present`` or
+            ``product_not_found`` for additions, ``removed`` or
+            ``not_present`` for removals.
+
+        Raises:
+            HTTPException: 400 if the customer does not exist or a product
+                is both added and removed, 403 on ACL failure, 409 if a
+                concurrent add of the same product keeps conflicting.
+        """
+        add = list(dict.fromkeys(str(pid) for pid in add))
+        remove = list(dict.fromkeys(str(pid) for pid in remove))
+        if set(add) & set(remove):
+            raise HTTPException(400, 'Product both added and removed')
+
+        generation = await WishlistService._check_identity(
+            customer_id,
+            current_user,
+            'Customers can only modify their own list',
+        )
+        products = await ProductService.get_products(add) if add else {}
+        valid = [pid for pid in add if products[pid][0] is not None]
 
-        query = await session.execute(
-            select(WishlistItem).where(
+        cust = WishlistService._customer_cte(customer_id)
+        acl = WishlistService._acl_clause(cust, current_user)
+        revived, inserted = WishlistService._add_ctes(
+            customer_id, cust, acl, valid
+        )
+        deleted = (
+            update(WishlistItem)
+            .where(
                 WishlistItem.customer_id == customer_id,
-                WishlistItem.product_id == product_id,
+                WishlistItem.customer_id == cust.c.id,
+                WishlistItem.product_id.in_(remove),
                 WishlistItem.deleted_at.is_(None),
+                acl,
             )
+            .values(deleted_at=func.now())
+            .returning(*CHANGED_COLUMNS)
+            .cte('upd')
+        )
+        query = WishlistService._changes_query(
+            cust, added=(revived, inserted), removed=(deleted,)
         )
-        cust = query.scalar_one_or_none()
+        begun = await WishlistService._begin_write(customer_id)
+        for attempt in range(2):
+            try:
+                rows = (await session.execute(query)).all()
+                break
+            except IntegrityError:
+                # a concurrent add of the same product; once it committed,
+                # a retry reports it as already present
+                await session.rollback()
+                if attempt:
+                    raise HTTPException(409, 'Concurrent wishlist update')
 
-        if not cust:
-            raise HTTPException(404, 'Product not found')
+        try:
+            WishlistService._authorize(
+                rows[0].email if rows else None,
+                current_user,
+                'Customers can only modify their own list',
+            )
+        except HTTPException:
+            await session.rollback()
+            raise
 
-        cust.deleted_at = datetime.now(timezone.utc)
         await session.commit()
+        await WishlistService._sync_cache(
+            customer_id, rows, generation, begun
+        )
+
+        added = {r.product_id for r in rows if r.action == 'add'}
+        removed = {r.product_id for r in rows if r.action == 'remove'}
+        items = []
+        for pid in add:
+            if pid in added:
+                status = 'added'
+            elif products[pid][0] is None:
+                status = 'product_not_found'
+            else:
+                status = 'already_present'
+            items.append(
+                {'product_id': pid, 'action': 'add', 'status': status}
+            )
+        for pid in remove:
+            status = 'removed' if pid in removed else 'not_present'
+            items.append(
+                {'product_id': pid, 'action': 'remove', 'status': status}
+            )
+
+        return {'items': items}
@@ -0,0 +1,98 @@
+"""Compares Redis memory used by the two-key product cache layout and the
+single-record layout.
+
+Writes synthetic products into a scratch Redis database, measures
+``used_memory`` before and after each layout and flushes the database.
+Never point it at a database holding real data.
+
+The record layout uses the codec configured in PRODUCT_CACHE_CODEC.
+
+Usage:
+    python -m benchmarks.product_cache_memory --count 100000 --db 15
+"""
+import argparse
+import asyncio
+import json
+import time
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.services.product_cache import (
+    CacheRecord,
+    encode_record,
+    legacy_keys,
+    record_key,
+)
+
+
+def synthetic_product(i: int) -> dict:
+    return {
+        'price': round(10 + (i % 1000) * 1.37, 2),
+        'image': f'https://image.com/prod{i}.png',
+        'brand': f'brand{i % 50}',
+        'id': i,
+        'title': f'Produto sintético {i}',
+        'reviewScore': i % 5,
+    }
+
+
+async def used_memory(client: Redis) -> int:
+    return (await client.info('memory'))['used_memory']
+
+
+async def write_legacy(client: Redis, count: int, chunk: int):
+    for start in range(0, count, chunk):
+        async with client.pipeline(transaction=False) as pipe:
+            for i in range(start, min(start + chunk, count)):
+                payload = json.dumps(synthetic_product(i))
+                short_key, long_key = legacy_keys(i)
+                pipe.set(short_key, payload, ex=300)
+                pipe.set(long_key, payload, ex=86400)
+            await pipe.execute()
+
+
+async def write_records(client: Redis, count: int, chunk: int):
+    now = time.time()
+    for start in range(0, count, chunk):
+        async with client.pipeline(transaction=False) as pipe:
+            for i in range(start, min(start + chunk, count)):
+                record = CacheRecord(synthetic_product(i), now, now + 300)
+                pipe.set(record_key(i), encode_record(record), ex=86400)
+            await pipe.execute()
+
+
+async def measure(client: Redis, writer, count: int, chunk: int) -> int:
+    await client.flushdb()
+    before = await used_memory(client)
+    await writer(client, count, chunk)
+    after = await used_memory(client)
+    await client.flushdb()
+    return after - before
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--chunk', type=int, default=1000)
+    parser.add_argument('--db', type=int, default=15)
+    args = parser.parse_args()
+
+    client = Redis(
+        host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=args.db
+    )
+    try:
+        legacy = await measure(client, write_legacy, args.count, args.chunk)
+        records = await measure(client, write_records, args.count, args.chunk)
+    finally:
+        await client.aclose()
+
+    print(f'products:            {args.count}')
+    print(f'codec:               {settings.PRODUCT_CACHE_CODEC}')
+    print(f'two-key layout:      {legacy / 2**20:10.2f} MiB '
+          f'({legacy / args.count:.0f} B/product)')
+    print(f'single-record:       {records / 2**20:10.2f} MiB '
+          f'({records / args.count:.0f} B/product)')
+    print(f'saving:              {100 * (1 - records / legacy):10.1f} %')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Compares per-page latency of offset and keyset (cursor) pagination on
+a very large wishlist.
+
+Creates a throwaway customer with ``--items`` wishlist items, times the
+page query at increasing depths in both modes and deletes the customer
+(items cascade). Run it against a scratch database with the migrations
+applied.
+
+Usage:
+    python -m benchmarks.wishlist_pagination --items 200000 --limit 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.services.wishlist_service import WishlistService
+
+# spread creation times so the (created_at, id) order is meaningful
+SEED = text(
+    """
+    INSERT INTO wishlist_item (id, customer_id, product_id, created_at)
+    SELECT gen_random_uuid(), :customer_id, n::text,
+           now() - make_interval(secs => :items - n)
+    FROM generate_series(1, :items) AS n
+    """
+)
+
+
+async def timed(conn, query, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        rows = (await conn.execute(query)).all()
+    return (time.perf_counter() - started) / repeat * 1000, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=200_000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    customer_id = uuid.uuid4()
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    'INSERT INTO customers (id, name, email) '
+                    "VALUES (:id, 'benchmark', :email)"
+                ),
+                {'id': customer_id, 'email': f'{customer_id}@bench.local'},
+            )
+            await conn.execute(
+                SEED, {'customer_id': customer_id, 'items': args.items}
+            )
+            await conn.execute(text('ANALYZE wishlist_item'))
+
+        print(f'{"depth":>10} {"offset ms":>12} {"cursor ms":>12}')
+        async with engine.connect() as conn:
+            depth = args.limit
+            while depth < args.items:
+                offset_ms, _ = await timed(
+                    conn,
+                    WishlistService._page_query(
+                        customer_id, args.limit, offset=depth
+                    ),
+                    args.repeat,
+                )
+                # the cursor of the item right before this page
+                _, rows = await timed(
+                    conn,
+                    WishlistService._page_query(
+                        customer_id, 0, offset=depth - 1
+                    ),
+                    1,
+                )
+                after = (rows[0].created_at, rows[0].id)
+                cursor_ms, _ = await timed(
+                    conn,
+                    WishlistService._page_query(
+                        customer_id, args.limit, after=after
+                    ),
+                    args.repeat,
+                )
+                print(f'{depth:>10} {offset_ms:>12.2f} {cursor_ms:>12.2f}')
+                depth *= 10
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text('DELETE FROM customers WHERE id = :id'),
+                {'id': customer_id},
+            )
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""Compares the plain and the hash-partitioned wishlist item layouts.
+
+Generates the same synthetic data (``--rows`` items over ``--customers``
+customers, a tenth of them soft-deleted) into two scratch tables, one per
+layout, then reports load throughput, per-request query latency, VACUUM
+time and table/index sizes. Run it against a scratch database; 100M rows
+need roughly 40 GB per layout.
+
+Usage:
+    python -m benchmarks.wishlist_partitioning --rows 100000000
+        --customers 2000000 --partitions 16
+"""
+import argparse
+import asyncio
+import random
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.models.partitioning import create_item_table
+
+LAYOUTS = {'plain': 'bench_wishlist_plain', 'hash': 'bench_wishlist_hash'}
+
+# customer ids are derived from their number, so samples can be rebuilt
+CUSTOMER = "md5('customer' || {n})::uuid"
+
+GENERATE = """
+INSERT INTO {table} (id, customer_id, product_id, created_at, deleted_at)
+SELECT
+    gen_random_uuid(),
+    {customer},
+    (random() * 100000)::int::text,
+    now() - make_interval(secs => random() * 31536000),
+    CASE WHEN random() < 0.1 THEN now() END
+FROM generate_series(:start, :stop) AS n
+ON CONFLICT DO NOTHING
+"""
+
+QUERIES = {
+    'list_page': """
+        SELECT product_id, created_at, id FROM {table}
+        WHERE customer_id = {customer} AND deleted_at IS NULL
+        ORDER BY created_at, id LIMIT 20
+    """,
+    'count': """
+        SELECT count(*) FROM {table}
+        WHERE customer_id = {customer} AND deleted_at IS NULL
+    """,
+    'add': """
+        INSERT INTO {table} (id, customer_id, product_id)
+        VALUES (gen_random_uuid(), {customer}, 'bench')
+        ON CONFLICT DO NOTHING
+    """,
+    'remove': """
+        UPDATE {table} SET deleted_at = now()
+        WHERE customer_id = {customer} AND product_id = 'bench'
+          AND deleted_at IS NULL
+    """,
+}
+
+SIZES = """
+SELECT
+    sum(pg_table_size(relid)) AS table_bytes,
+    sum(pg_indexes_size(relid)) AS index_bytes
+FROM pg_partition_tree(CAST(:table AS regclass))
+WHERE isleaf
+"""
+
+
+async def load(engine, table, args):
+    started = time.perf_counter()
+    customer = CUSTOMER.format(n=f'(n % {args.customers})')
+    for start in range(0, args.rows, args.chunk):
+        stop = min(start + args.chunk, args.rows) - 1
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(GENERATE.format(table=table, customer=customer)),
+                {'start': start, 'stop': stop},
+            )
+        print(f'  {table}: {stop + 1:,} rows', end='\r', flush=True)
+    print()
+    return args.rows / (time.perf_counter() - started)
+
+
+async def measure(engine, table, samples):
+    results = {}
+    async with engine.connect() as conn:
+        for name, query in QUERIES.items():
+            started = time.perf_counter()
+            for n in samples:
+                customer = CUSTOMER.format(n=n)
+                await conn.execute(
+                    text(query.format(table=table, customer=customer))
+                )
+            await conn.commit()
+            elapsed = time.perf_counter() - started
+            results[f'{name}_ms'] = elapsed / len(samples) * 1000
+
+        conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+        started = time.perf_counter()
+        await conn.execute(text(f'VACUUM (ANALYZE) {table}'))
+        results['vacuum_s'] = time.perf_counter() - started
+
+        sizes = (await conn.execute(text(SIZES), {'table': table})).one()
+        results['table_gb'] = sizes.table_bytes / 1024**3
+        results['index_gb'] = sizes.index_bytes / 1024**3
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000_000)
+    parser.add_argument('--customers', type=int, default=2_000_000)
+    parser.add_argument('--partitions', type=int, default=16)
+    parser.add_argument('--chunk', type=int, default=1_000_000)
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument(
+        '--keep', action='store_true', help='keep the scratch tables'
+    )
+    args = parser.parse_args()
+
+    engine = create_async_engine(settings.DATABASE_URL)
+    samples = random.sample(
+        range(args.customers), min(args.samples, args.customers)
+    )
+    report = {}
+    try:
+        for layout, table in LAYOUTS.items():
+            partitions = args.partitions if layout == 'hash' else 0
+            async with engine.begin() as conn:
+                await conn.execute(text(f'DROP TABLE IF EXISTS {table}'))
+                for statement in create_item_table(
+                    table, partitions, f'_{table}', foreign_key=False
+                ):
+                    await conn.execute(text(statement))
+
+            rows_per_second = await load(engine, table, args)
+            report[layout] = {
+                'load_rows_s': rows_per_second,
+                **await measure(engine, table, samples),
+            }
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                for table in LAYOUTS.values():
+                    await conn.execute(text(f'DROP TABLE IF EXISTS {table}'))
+        await engine.dispose()
+
+    print(f'{"metric":>14} ' + ' '.join(f'{k:>12}' for k in report))
+    for metric in next(iter(report.values()), {}):
+        values = ' '.join(f'{r[metric]:>12.2f}' for r in report.values())
+        print(f'{metric:>14} {values}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
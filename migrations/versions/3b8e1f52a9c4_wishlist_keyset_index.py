@@ -0,0 +1,44 @@
+"""wishlist keyset index
+
+Revision ID: 3b8e1f52a9c4
+Revises: c73064b51906
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e1f52a9c4'
+down_revision: Union[str, Sequence[str], None] = 'c73064b51906'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently to avoid locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_wishlist_item_customer_created',
+            'wishlist_item',
+            ['customer_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_wishlist_item_customer_created',
+            table_name='wishlist_item',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
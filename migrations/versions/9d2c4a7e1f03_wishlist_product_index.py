@@ -0,0 +1,44 @@
+"""wishlist product index
+
+Revision ID: 9d2c4a7e1f03
+Revises: 3b8e1f52a9c4
+Create Date: 2026-10-18 15:40:08.517362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2c4a7e1f03'
+down_revision: Union[str, Sequence[str], None] = '3b8e1f52a9c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently to avoid locking writes on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_wishlist_item_product_customer',
+            'wishlist_item',
+            ['product_id', 'customer_id'],
+            unique=False,
+            postgresql_where=sa.text('deleted_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_wishlist_item_product_customer',
+            table_name='wishlist_item',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,98 @@
+"""purge archive
+
+Revision ID: e41a6b9d3c27
+Revises: 9d2c4a7e1f03
+Create Date: 2026-10-18 17:05:44.190836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a6b9d3c27'
+down_revision: Union[str, Sequence[str], None] = '9d2c4a7e1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    (
+        'ix_wishlist_item_deleted_at',
+        'wishlist_item',
+        ['deleted_at'],
+        'deleted_at IS NOT NULL',
+    ),
+    ('ix_wishlist_item_customer_id', 'wishlist_item', ['customer_id'], None),
+    (
+        'ix_customers_deleted_at',
+        'customers',
+        ['deleted_at'],
+        'deleted_at IS NOT NULL',
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'customers_archive',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            'archived_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'wishlist_item_archive',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('customer_id', sa.UUID(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            'archived_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # built concurrently to avoid locking writes on large tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_table('wishlist_item_archive')
+    op.drop_table('customers_archive')
@@ -0,0 +1,61 @@
+"""wishlist item partitioned
+
+Creates ``wishlist_item_new``, hash-partitioned by ``customer_id`` into
+``WISHLIST_PARTITIONS`` partitions, and a trigger mirroring every write on
+``wishlist_item`` into it. Existing rows are then copied online with
+``python -m app.cli.backfill_partitions`` and swapped in by
+``python -m app.cli.cutover_partitions``, an operator step kept out of
+``alembic upgrade head``.
+
+Revision ID: f7b3d2c8a610
+Revises: e41a6b9d3c27
+Create Date: 2026-10-18 18:22:51.730114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+from app.models.partitioning import MIRROR_FUNCTION, create_item_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b3d2c8a610'
+down_revision: Union[str, Sequence[str], None] = 'e41a6b9d3c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# after a cutover the partitioned table is wishlist_item itself
+CHECK_REVERTED = """
+DO $$
+BEGIN
+    IF to_regclass('wishlist_item_unpartitioned') IS NOT NULL THEN
+        RAISE EXCEPTION
+            'run python -m app.cli.cutover_partitions --revert first';
+    END IF;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in create_item_table(
+        'wishlist_item_new', settings.WISHLIST_PARTITIONS, '_new'
+    ):
+        op.execute(statement)
+    op.execute(MIRROR_FUNCTION)
+    op.execute(
+        'CREATE TRIGGER wishlist_item_mirror '
+        'AFTER INSERT OR UPDATE OR DELETE ON wishlist_item '
+        'FOR EACH ROW EXECUTE FUNCTION '
+        "wishlist_item_mirror('wishlist_item_new', 'customer_id, id')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(CHECK_REVERTED)
+    op.execute('DROP TRIGGER IF EXISTS wishlist_item_mirror ON wishlist_item')
+    op.execute('DROP FUNCTION IF EXISTS wishlist_item_mirror()')
+    op.execute('DROP TABLE IF EXISTS wishlist_item_new')
@@ -0,0 +1,61 @@
+import json
+from unittest.mock import patch
+import pytest
+from app.services.catalog_loader import iter_products, load_catalog
+from app.services.product_cache import PRODUCT_GENERATION_KEY, decode_record
+from app.services.product_service import memory_cache
+from tests.product_service_test import FakeRedis
+
+
+@pytest.mark.asyncio
+async def test_load_catalog_is_idempotent(tmp_path):
+    path = tmp_path / 'catalog.jsonl'
+    lines = [
+        json.dumps({'id': i, 'title': f'p{i}', 'extra': 1}) for i in range(5)
+    ]
+    path.write_text('\n'.join([*lines, '{broken', '{"title": "no id"}']))
+    fake = FakeRedis()
+
+    with patch('app.core.redis._client', fake):
+        first = await load_catalog(path, chunk_size=2)
+        second = await load_catalog(path, chunk_size=2)
+
+    assert first['read'] == 7
+    assert first['written'] == 5
+    assert first['invalid'] == 2
+    assert second['written'] == 0
+    assert second['skipped'] == 5
+
+    record = decode_record(fake.store['product:3'])
+    assert record.payload == {'id': 3, 'title': 'p3'}
+    assert not record.is_fresh()
+
+
+@pytest.mark.asyncio
+async def test_overwrite_invalidates_products_and_listing_etags(tmp_path):
+    path = tmp_path / 'catalog.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps({'id': i, 'title': 'new'}) for i in range(3))
+    )
+    fake = FakeRedis()
+    memory_cache.set('1', {'id': 1, 'title': 'old'})
+
+    with patch('app.core.redis._client', fake):
+        await load_catalog(path, chunk_size=2)
+        assert PRODUCT_GENERATION_KEY not in fake.store
+        stats = await load_catalog(path, chunk_size=2, overwrite=True)
+
+    assert stats['written'] == 3
+    assert memory_cache.get('1') is None
+    # once per load, not per chunk
+    assert fake.store[PRODUCT_GENERATION_KEY] == 1
+
+
+def test_iter_products_reads_csv(tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text('id,title,price,reviewScore\n1,Mouse,89.5,5\n2,Cabo,x,\n')
+
+    assert list(iter_products(path)) == [
+        {'id': 1, 'title': 'Mouse', 'price': 89.5, 'reviewScore': 5.0},
+        None,
+    ]
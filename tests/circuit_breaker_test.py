@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import nullcontext
+import pytest
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+async def call(breaker, fail=False):
+    async with breaker.guard():
+        if fail:
+            raise RuntimeError('upstream down')
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers_after_cooldown():
+    breaker = CircuitBreaker(
+        'test',
+        window_size=4,
+        minimum_calls=4,
+        cooldown=0.05,
+        half_open_max_calls=1,
+    )
+
+    for fail in (False, True, True, False):
+        with pytest.raises(RuntimeError) if fail else nullcontext():
+            await call(breaker, fail)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.available()
+    with pytest.raises(CircuitOpenError):
+        await call(breaker)
+
+    await asyncio.sleep(0.06)
+    await call(breaker)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['rejected'] == 1
+
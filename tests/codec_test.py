@@ -0,0 +1,27 @@
+import json
+import pytest
+from app.core import codec
+
+
+def test_encode_round_trip_with_compression():
+    value = {'title': 'x' * 1000, 'price': 1.5}
+
+    raw = codec.encode(value, 'json', compress_min_bytes=100)
+
+    assert raw[0] == 0x01 | codec.COMPRESSED
+    assert len(raw) < len(json.dumps(value))
+    assert codec.decode(raw) == value
+
+
+def test_decode_reads_legacy_json():
+    assert codec.decode(b'{"id": 1}') == {'id': 1}
+
+
+def test_decode_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        codec.decode(b'\x7f...')
+
+
+def test_decode_rejects_corrupt_compressed_value():
+    with pytest.raises(ValueError):
+        codec.decode(bytes([0x01 | codec.COMPRESSED]) + b'not zlib')
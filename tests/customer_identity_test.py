@@ -0,0 +1,145 @@
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from fastapi import HTTPException
+from app.services.customer_identity import (
+    INVALIDATE_IDENTITY,
+    STORE_IDENTITY,
+    CustomerIdentity,
+    CustomerIdentityCache,
+    identity_cache,
+    keys,
+)
+from app.services.customer_service import CustomerService
+from app.services.wishlist_service import WishlistService
+
+
+def fake_redis(results=(None, None), stored=1):
+    pipe = MagicMock()
+    pipe.__len__.return_value = 2
+    pipe.execute = AsyncMock(return_value=list(results))
+    redis = MagicMock()
+    redis.eval = AsyncMock(return_value=stored)
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    return redis, pipe
+
+
+@pytest.fixture(autouse=True)
+def empty_identity_cache():
+    identity_cache.clear()
+    yield
+    identity_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_load_reads_the_database_once():
+    row = MagicMock(id='c1', email='a@b.com', deleted_at=None)
+    result = MagicMock()
+    result.one_or_none.return_value = row
+    session = AsyncMock()
+    session.execute.return_value = result
+    redis, _ = fake_redis((None, b'4'))
+
+    with patch('app.core.redis._client', redis):
+        first = await CustomerIdentityCache.load(session, 'c1')
+        second = await CustomerIdentityCache.load(session, 'c1')
+
+    assert first == second == CustomerIdentity('c1', 'a@b.com', False)
+    session.execute.assert_awaited_once()
+    script, _, *args = redis.eval.await_args.args
+    assert script == STORE_IDENTITY
+    assert args[:3] == [*keys('c1'), '4']
+
+
+@pytest.mark.asyncio
+async def test_identity_invalidated_meanwhile_is_not_cached():
+    redis, _ = fake_redis(stored=0)
+
+    with patch('app.core.redis._client', redis):
+        await CustomerIdentityCache.store(
+            'c1', CustomerIdentity('c1', 'old@b.com', False), '4'
+        )
+
+    assert identity_cache.get(keys('c1')[0]) is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_falls_back_to_redis():
+    raw = json.dumps({'id': 'c1', 'email': 'a@b.com', 'deleted': True})
+    redis, _ = fake_redis((raw.encode(), b'4'))
+
+    with patch('app.core.redis._client', redis):
+        identity, generation = await CustomerIdentityCache.lookup('c1')
+
+    assert identity == CustomerIdentity('c1', 'a@b.com', True)
+    assert generation is None
+    assert identity_cache.get(keys('c1')[0]) == identity
+
+
+@pytest.mark.asyncio
+async def test_invalidate_bumps_the_generation_on_every_worker():
+    identity_cache.set(
+        keys('c1')[0], CustomerIdentity('c1', 'a@b.com', False)
+    )
+    redis, pipe = fake_redis()
+
+    with patch('app.core.redis._client', redis):
+        await CustomerIdentityCache.invalidate('c1')
+
+    assert identity_cache.get(keys('c1')[0]) is None
+    script, _, *invalidated = pipe.eval.call_args.args
+    assert script == INVALIDATE_IDENTITY
+    assert invalidated[:2] == keys('c1')
+    message = json.loads(pipe.publish.call_args.args[1])
+    assert message['ns'] == 'customer'
+    assert message['keys'] == [keys('c1')[0]]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_matches_any_spelling_of_the_id():
+    customer_id = uuid.uuid4()
+    identity_cache.set(
+        keys(customer_id)[0],
+        CustomerIdentity(str(customer_id), 'a@b.com', False),
+    )
+    redis, _ = fake_redis()
+
+    with patch('app.core.redis._client', redis):
+        await CustomerIdentityCache.invalidate(str(customer_id).upper())
+
+    assert identity_cache.get(keys(customer_id)[0]) is None
+
+
+@pytest.mark.asyncio
+async def test_customer_acl_uses_the_cached_identity():
+    identity_cache.set(
+        keys('c1')[0], CustomerIdentity('c1', 'other@b.com', False)
+    )
+    session = AsyncMock()
+    user = {'roles': ['CUSTOMER'], 'email': 'a@b.com'}
+
+    with pytest.raises(HTTPException) as e:
+        await CustomerService.soft_delete(session, 'c1', user)
+
+    assert e.value.status_code == 403
+    session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_wishlist_rejects_deleted_customer_without_database():
+    identity_cache.set(keys('c1')[0], CustomerIdentity('c1', 'a@b.com', True))
+    session = AsyncMock()
+
+    with patch(
+        'app.services.wishlist_service.ProductService.get_product'
+    ) as gp:
+        with pytest.raises(HTTPException) as e:
+            await WishlistService.add_product(
+                session, 'c1', '7', {'roles': ['ADMIN'], 'email': 'x@b.com'}
+            )
+
+    assert e.value.status_code == 400
+    gp.assert_not_called()
+    session.execute.assert_not_called()
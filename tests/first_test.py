@@ -1,10 +1,20 @@
+import json
+import uuid
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
-from app.services.wishlist_service import WishlistService
+from app.services.wishlist_service import (
+    WishlistService,
+    decode_cursor,
+    encode_cursor,
+)
 from app.models import Customer
 
 
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+CREATED = datetime(2026, 1, 1, tzinfo=timezone.utc)
 
 
 class FakeScalarResult:
@@ -16,9 +26,10 @@ class FakeScalarResult:
 
 
 class FakeResult:
-    def __init__(self, scalar_value=None, scalar_list=None):
+    def __init__(self, scalar_value=None, scalar_list=None, rows=None):
         self.scalar_value = scalar_value
         self.scalar_list = scalar_list or []
+        self.rows = rows or []
 
     def scalar_one_or_none(self):
         return self.scalar_value
@@ -26,36 +37,217 @@ class FakeResult:
     def scalars(self):
         return FakeScalarResult(self.scalar_list)
 
+    def all(self):
+        return self.rows
+
+    def one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+
+class Row(tuple):
+    email = property(lambda self: self[0])
+    product_id = property(lambda self: self[1])
+    created_at = property(lambda self: self[2])
+    id = property(lambda self: self[3])
+
+
+class Change(tuple):
+    email = property(lambda self: self[0])
+    action = property(lambda self: self[1])
+    product_id = property(lambda self: self[2])
+    id = property(lambda self: uuid.UUID(int=0))
+    created_at = property(lambda self: CREATED)
+    updated_at = property(lambda self: CREATED)
+
+
+@pytest.fixture(autouse=True)
+def no_wishlist_cache():
+    with patch(
+        "app.services.wishlist_service.settings.WISHLIST_CACHE_ENABLED", False
+    ), patch(
+        "app.services.wishlist_service.settings.WISHLIST_POPULARITY_ENABLED",
+        False,
+    ), patch(
+        "app.services.wishlist_service.settings.CUSTOMER_IDENTITY_CACHE_ENABLED",
+        False,
+    ):
+        yield
+
 
 @pytest.mark.asyncio
 async def test_list_items_success():
     session = AsyncMock()
 
     session.execute.side_effect = [
-        FakeResult(scalar_value=Customer(id=1, email="a@b.com", deleted_at=None)),
-        FakeResult(scalar_list=[10, 20]),  
+        FakeResult(rows=[
+            Row(("a@b.com", 10, CREATED, uuid.uuid4())),
+            Row(("a@b.com", 20, CREATED, uuid.uuid4())),
+        ]),
     ]
 
-    # mock ProductService.get_product
-    with patch("app.services.wishlist_service.ProductService.get_product") as gp:
-        gp.side_effect = [
-            ({"id": 10}, "api"),
-            ({"id": 20}, "cache_short"),
-        ]
+    # mock ProductService.get_products
+    with patch("app.services.wishlist_service.ProductService.get_products") as gp:
+        gp.return_value = {
+            "10": ({"id": 10}, "api"),
+            "20": ({"id": 20}, "cache_short"),
+        }
 
         result = await WishlistService.list_items(
             session=session,
             customer_id=1,
-            user={"roles": ["ADMIN"], "email": "admin@x.com"},
+            current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
             limit=10,
             offset=0,
         )
 
     assert result["pagination"]["count"] == 2
+    assert result["pagination"]["next_cursor"] is None
     assert len(result["items"]) == 2
     assert result["source"]["from_api"] == [10]
     assert result["source"]["from_cache_short"] == [20]
+    # customer check and page in a single statement
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_list_items_returns_next_cursor():
+    ids = [uuid.uuid4() for _ in range(3)]
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[
+            Row(("a@b.com", str(n), CREATED, ids[n])) for n in range(3)
+        ]),
+    ]
+
+    with patch("app.services.wishlist_service.ProductService.get_products") as gp:
+        gp.return_value = {str(n): ({"id": n}, "api") for n in range(3)}
+        result = await WishlistService.list_items(
+            session=session,
+            customer_id=1,
+            current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
+            limit=2,
+            offset=0,
+        )
+
+    # the extra row only signals that there is a next page
+    assert result["pagination"]["count"] == 2
+    assert decode_cursor(result["pagination"]["next_cursor"]) == (
+        CREATED, ids[1]
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_items_writes_products_then_summary():
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[
+            Row(("a@b.com", "10", CREATED, uuid.uuid4())),
+            Row(("a@b.com", "20", CREATED, uuid.uuid4())),
+        ]),
+    ]
 
+    async def iter_products(rows):
+        yield "20", ({"id": 20}, "api")
+        yield "10", (None, "not_found")
+
+    with patch(
+        "app.services.wishlist_service.ProductService.iter_products",
+        iter_products,
+    ):
+        lines = await WishlistService.stream_items(
+            session=session,
+            customer_id=1,
+            current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
+            limit=10,
+            offset=0,
+        )
+        records = [json.loads(line) async for line in lines]
+
+    assert records[0] == {
+        "type": "item",
+        "position": 1,
+        "product_id": "20",
+        "source": "api",
+        "product": {"id": 20},
+    }
+    assert records[1]["position"] == 0
+    assert records[1]["product"] is None
+    summary = records[2]
+    assert summary["type"] == "summary"
+    assert summary["source"]["not_found"] == ["10"]
+    assert summary["pagination"]["count"] == 1
+
+
+
+def test_decode_cursor_rejects_garbage():
+    naive = encode_cursor(datetime(2026, 1, 1), uuid.uuid4())
+
+    for cursor in ("not-a-cursor", naive):
+        with pytest.raises(HTTPException) as e:
+            decode_cursor(cursor)
+
+        assert e.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_items_acl():
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[Row(("a@b.com", None, None, None))])
+    ]
+
+    with pytest.raises(HTTPException) as e:
+        await WishlistService.list_items(
+            session=session,
+            customer_id=1,
+            current_user={"roles": ["CUSTOMER"], "email": "other@b.com"},
+            limit=10,
+            offset=0,
+        )
+
+    assert e.value.status_code == 403
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_add_product_success():
+    session = AsyncMock()
+    session.execute.side_effect = [FakeResult(rows=[Change(("a@b.com", "add", "10"))])]
+
+    with patch("app.services.wishlist_service.ProductService.get_product") as gp:
+        gp.return_value = ({"id": 10}, "api")
+        result = await WishlistService.add_product(
+            session=session,
+            customer_id=1,
+            product_id="10",
+            current_user={"roles": ["CUSTOMER"], "email": "a@b.com"},
+        )
+
+    assert result == {"product_id": "10", "added": True}
+    assert session.execute.await_count == 1
+    session.commit.assert_awaited_once()
+
+
+
+@pytest.mark.asyncio
+async def test_add_product_already_present():
+    session = AsyncMock()
+    # nothing revived nor inserted: ON CONFLICT DO NOTHING skipped it
+    session.execute.side_effect = [FakeResult(rows=[Change(("a@b.com", None, None))])]
+
+    with patch("app.services.wishlist_service.ProductService.get_product") as gp:
+        gp.return_value = ({"id": 10}, "api")
+        with pytest.raises(HTTPException) as e:
+            await WishlistService.add_product(
+                session=session,
+                customer_id=1,
+                product_id="10",
+                current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
+            )
+
+    assert e.value.status_code == 409
+    assert session.execute.await_count == 1
+    session.commit.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -64,8 +256,7 @@ async def test_add_product_not_found():
     session = AsyncMock()
 
     session.execute.side_effect = [
-        FakeResult(scalar_value=Customer(id=1, email="a@b.com", deleted_at=None)),
-        FakeResult(scalar_list=[10, 20]),  
+        FakeResult(scalar_value="a@b.com"),
     ]
 
     # mock get_product -> retorna None
@@ -77,7 +268,7 @@ async def test_add_product_not_found():
                 session=session,
                 customer_id=1,
                 product_id="999",
-                user={"roles": ["ADMIN"], "email": "admin@x.com"},
+                current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
             )
 
     assert e.value.status_code == 400
@@ -95,8 +286,7 @@ async def test_soft_delete_product_not_found():
     session = AsyncMock()
 
     session.execute.side_effect = [
-        FakeResult(scalar_value=Customer(id=1, email="a@b.com", deleted_at=None)),
-        FakeResult(scalar_list=[10, 20]),  
+        FakeResult(rows=[Change(("a@b.com", None, None))]),
     ]
 
     with pytest.raises(HTTPException) as e:
@@ -104,8 +294,94 @@ async def test_soft_delete_product_not_found():
             session=session,
             customer_id=1,
             product_id=55,
-            user={"roles": ["ADMIN"], "email": "admin@x.com"},
+            current_user={"roles": ["ADMIN"], "email": "admin@x.com"},
         )
 
     assert e.value.status_code == 404
-    assert "Product not found" in e.value.detail
\ No newline at end of file
+    assert "Product not found" in e.value.detail
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_reports_each_item():
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[
+            Change(("a@b.com", "add", "1")),
+            Change(("a@b.com", "remove", "9")),
+        ])
+    ]
+
+    with patch("app.services.wishlist_service.ProductService.get_products") as gp:
+        gp.return_value = {
+            "1": ({"id": 1}, "api"),
+            "2": ({"id": 2}, "cache_short"),
+            "3": (None, "not_found"),
+        }
+        result = await WishlistService.bulk_update(
+            session=session,
+            customer_id=1,
+            add=["1", "2", "3", "1"],
+            remove=["9", "8"],
+            current_user={"roles": ["CUSTOMER"], "email": "a@b.com"},
+        )
+
+    gp.assert_awaited_once_with(["1", "2", "3"])
+    assert session.execute.await_count == 1
+    assert [(i["product_id"], i["status"]) for i in result["items"]] == [
+        ("1", "added"),
+        ("2", "already_present"),
+        ("3", "product_not_found"),
+        ("9", "removed"),
+        ("8", "not_present"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_retries_a_concurrent_add_conflict():
+    session = AsyncMock()
+    conflict = IntegrityError("INSERT", {}, Exception("uq_customer_product_active"))
+    session.execute.side_effect = [conflict, conflict]
+
+    with patch("app.services.wishlist_service.ProductService.get_products") as gp:
+        gp.return_value = {"1": ({"id": 1}, "api")}
+        with pytest.raises(HTTPException) as e:
+            await WishlistService.bulk_update(
+                session=session,
+                customer_id=1,
+                add=["1"],
+                remove=[],
+                current_user={"roles": ["ADMIN"], "email": "x@b.com"},
+            )
+
+    assert e.value.status_code == 409
+    assert session.execute.await_count == 2
+    assert session.rollback.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_customers_with_product_streams_partitions():
+    partitions = [
+        [MagicMock(id=1, email="a@b.com"), MagicMock(id=2, email="c@d.com")],
+        [MagicMock(id=3, email="e@f.com")],
+    ]
+
+    class FakeStream:
+        async def partitions(self):
+            for rows in partitions:
+                yield rows
+
+    session = AsyncMock()
+    session.stream.return_value = FakeStream()
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = session
+
+    with patch("app.services.wishlist_service.AsyncSessionLocal", factory):
+        chunks = [
+            chunk
+            async for chunk in WishlistService.customers_with_product("10", 2)
+        ]
+
+    assert chunks == [[(1, "a@b.com"), (2, "c@d.com")], [(3, "e@f.com")]]
+    query = session.stream.await_args.args[0]
+    assert query.get_execution_options()["yield_per"] == 2
@@ -0,0 +1,20 @@
+from app.core.http_cache import etag_matches, make_etag
+
+
+def test_make_etag_depends_on_every_part():
+    etag = make_etag('customer', 3, 7, 10, 0, None)
+
+    assert etag.startswith('W/"')
+    assert etag == make_etag('customer', 3, 7, 10, 0, None)
+    assert etag != make_etag('customer', 4, 7, 10, 0, None)
+
+
+def test_etag_matches_weakly_and_in_lists():
+    etag = 'W/"abc"'
+
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"x"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,49 @@
+from app.cli.cutover_partitions import CHECK_BACKFILL, cutover_statements
+from app.models.partitioning import INDEXES, create_item_table
+
+
+def test_partitioned_table_keys_include_customer_id():
+    statements = create_item_table('items', 4, '_new')
+
+    assert 'PRIMARY KEY (customer_id, id)' in statements[0]
+    assert 'PARTITION BY HASH (customer_id)' in statements[0]
+    assert statements[4].endswith('(MODULUS 4, REMAINDER 3)')
+    unique = [s for s in statements if s.startswith('CREATE UNIQUE INDEX')]
+    assert unique == [
+        'CREATE UNIQUE INDEX uq_customer_product_active_new ON items '
+        '(customer_id, product_id) WHERE deleted_at IS NULL'
+    ]
+    assert len(statements) == 1 + 4 + len(INDEXES)
+
+
+def test_plain_table_has_the_same_indexes():
+    statements = create_item_table('items', 0, foreign_key=False)
+
+    assert 'PRIMARY KEY (id)' in statements[0]
+    assert 'PARTITION BY' not in statements[0]
+    assert 'REFERENCES' not in statements[0]
+    assert len(statements) == 1 + len(INDEXES)
+
+
+def test_cutover_checks_the_backfill_before_swapping():
+    statements = cutover_statements()
+
+    assert statements[1] == (
+        'LOCK TABLE wishlist_item, wishlist_item_new IN ACCESS EXCLUSIVE MODE'
+    )
+    assert statements[2] == CHECK_BACKFILL
+    assert 'ALTER TABLE wishlist_item_new RENAME TO wishlist_item' in (
+        statements
+    )
+    assert "('wishlist_item_unpartitioned', 'id')" in statements[-1]
+
+
+def test_revert_swaps_the_unpartitioned_table_back():
+    statements = cutover_statements(revert=True)
+
+    assert CHECK_BACKFILL not in statements
+    assert (
+        'ALTER TABLE wishlist_item_unpartitioned RENAME TO wishlist_item'
+        in statements
+    )
+    assert "('wishlist_item_new', 'customer_id, id')" in statements[-1]
@@ -0,0 +1,49 @@
+import time
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from app.services import product_service
+from app.services.product_cache import CacheRecord, encode_record
+from app.services.product_refresher import ProductRefresher
+
+
+@pytest.mark.asyncio
+async def test_refresh_once_only_refreshes_due_products():
+    now = time.time()
+    records = {
+        'product:1': encode_record(CacheRecord({'id': 1}, now, now + 3600)),
+        'product:2': encode_record(CacheRecord({'id': 2}, now, now + 5)),
+    }
+    redis = MagicMock()
+    redis.mget = AsyncMock(side_effect=lambda keys: [records.get(k) for k in keys])
+    resolve = AsyncMock(return_value={})
+
+    with patch('app.core.redis._client', redis), patch.object(
+        ProductRefresher,
+        'hot_product_ids',
+        AsyncMock(return_value=['1', '2', '3']),
+    ), patch(
+        'app.services.product_refresher.ProductService.resolve_misses',
+        resolve,
+    ), patch(
+        'app.services.product_refresher.asyncio.sleep', AsyncMock()
+    ):
+        refreshed = await ProductRefresher.refresh_once()
+
+    assert refreshed == 2
+    resolve.assert_awaited_once_with(['2', '3'])
+
+
+def test_access_counter_is_capped_and_can_be_disabled():
+    with patch.object(product_service, 'access_counts', Counter()) as counts, \
+            patch.object(
+                product_service.settings, 'PRODUCT_ACCESS_MAX_KEYS', 2
+            ):
+        product_service.count_access(['1', '2', '3'])
+        product_service.count_access(['2', '3'])
+        with patch.object(
+            product_service.settings, 'PRODUCT_ACCESS_TRACKING_ENABLED', False
+        ):
+            product_service.count_access(['1'])
+
+    assert counts == {'1': 1, '2': 2}
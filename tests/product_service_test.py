@@ -0,0 +1,271 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, patch
+import httpx
+import pytest
+from app.core.http_client import (
+    close_http_client,
+    get_http_client,
+    init_http_client,
+)
+from app.core.config import settings
+from app.core.memory_cache import MemoryCache
+from app.services.product_cache import (
+    CacheRecord,
+    decode_record,
+    encode_record,
+)
+from app.services.product_service import (
+    ProductNotFoundError,
+    ProductService,
+    lookup_errors,
+    memory_cache,
+)
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __len__(self):
+        return len(self.results)
+
+    def set(self, key, value, ex=None, px=None, nx=False, get=False):
+        previous = self.store.get(key)
+        if nx and key in self.store:
+            self.results.append(None)
+        else:
+            self.store[key] = value
+            self.results.append(previous if get else True)
+        return self
+
+    def delete(self, key):
+        self.results.append(int(self.store.pop(key, None) is not None))
+        return self
+
+    def publish(self, channel, message):
+        self.results.append(0)
+        return self
+
+    def eval(self, script, numkeys, *args):
+        for key in args[:numkeys]:
+            self.store.pop(key, None)
+        self.results.append(1)
+        return self
+
+    async def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeRedis:
+    def __init__(self, store=None):
+        self.store = store or {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        return [self.store.get(k) for k in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if not (nx and key in self.store):
+            self.store[key] = value
+
+    async def eval(self, script, numkeys, *args):
+        # only version bumps are evaluated outside pipelines
+        key = args[0]
+        self.store[key] = int(self.store.get(key, 0)) + 1
+        return self.store[key]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.store)
+
+
+def fresh(data):
+    now = time.time()
+    return encode_record(CacheRecord(data, now, now + 60))
+
+
+def stale(data):
+    now = time.time()
+    return encode_record(CacheRecord(data, now - 600, now - 300))
+
+
+@pytest.mark.asyncio
+async def test_get_products_resolves_each_layer():
+    fake = FakeRedis({
+        'product:1': fresh({'id': 1}),
+        'product:3': stale({'id': 3}),
+    })
+
+    async def fetch(pid):
+        if pid == '2':
+            return {'id': 2}
+        raise RuntimeError('upstream down')
+
+    memory_cache.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', AsyncMock(side_effect=fetch)
+    ), patch.object(settings, 'PRODUCT_STALE_WHILE_REVALIDATE', False):
+        result = await ProductService.get_products([1, 2, 3, 4])
+        again = await ProductService.get_products([1, 2])
+
+    assert result['1'] == ({'id': 1}, 'cache_short')
+    assert result['2'] == ({'id': 2}, 'api')
+    assert result['3'] == ({'id': 3}, 'cache_long')
+    assert result['4'] == (None, 'not_found')
+    assert decode_record(fake.store['product:2']).is_fresh()
+    assert again == {'1': ({'id': 1}, 'memory'), '2': ({'id': 2}, 'memory')}
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=10, ttl=60, max_bytes=10)
+    cache.set('a', 1, size=4)
+    cache.set('b', 2, size=4)
+    cache.get('a')
+    cache.set('c', 3, size=4)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.asyncio
+async def test_legacy_entries_are_read_and_converted():
+    fake = FakeRedis({'product:6:long': json.dumps({'id': 6})})
+
+    memory_cache.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', AsyncMock(side_effect=OSError)
+    ):
+        result = await ProductService.get_product('6')
+        await asyncio.sleep(0.01)
+
+    assert result == ({'id': 6}, 'cache_stale')
+    assert decode_record(fake.store['product:6']).payload == {'id': 6}
+
+
+@pytest.mark.asyncio
+async def test_fetch_from_api_uses_shared_client():
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        return httpx.Response(200, json={'id': 7})
+
+    await init_http_client(httpx.MockTransport(handler))
+    try:
+        first = await ProductService.fetch_from_api('7')
+        second = await ProductService.fetch_from_api('7')
+        client = get_http_client()
+    finally:
+        await close_http_client()
+
+    assert first == second == {'id': 7}
+    assert requested == ['/api/product/7', '/api/product/7']
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_upstream_call():
+    fake = FakeRedis()
+    calls = []
+
+    async def fetch(pid):
+        calls.append(pid)
+        await asyncio.sleep(0.01)
+        return {'id': int(pid)}
+
+    memory_cache.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', AsyncMock(side_effect=fetch)
+    ):
+        results = await asyncio.gather(
+            *(ProductService.get_product('5') for _ in range(10))
+        )
+
+    assert calls == ['5']
+    assert all(data == {'id': 5} for data, _ in results)
+    assert 'product:5:lease' not in fake.store
+
+
+@pytest.mark.asyncio
+async def test_stale_long_entry_is_served_and_refreshed():
+    fake = FakeRedis({'product:8': stale({'id': 8, 'old': True})})
+    fetch = AsyncMock(return_value={'id': 8})
+
+    memory_cache.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', fetch
+    ):
+        data, src = await ProductService.get_product('8')
+        await asyncio.sleep(0.01)
+
+    assert (data, src) == ({'id': 8, 'old': True}, 'cache_stale')
+    fetch.assert_awaited_once_with('8')
+    assert decode_record(fake.store['product:8']).payload == {'id': 8}
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_cached_as_tombstone():
+    fake = FakeRedis({'product:9': stale({'id': 9})})
+    fetch = AsyncMock(side_effect=ProductNotFoundError('9'))
+
+    memory_cache.clear()
+    lookup_errors.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', fetch
+    ), patch.object(settings, 'PRODUCT_STALE_WHILE_REVALIDATE', False):
+        first = await ProductService.get_product('9')
+        second = await ProductService.get_product('9')
+
+    assert first == second == (None, 'not_found')
+    fetch.assert_awaited_once()
+    assert decode_record(fake.store['product:9']).is_tombstone
+    assert lookup_errors['not_found'] == 1
+    assert lookup_errors['tombstone_hit'] == 1
+
+
+@pytest.mark.asyncio
+async def test_product_generation_bumps_only_on_content_change():
+    fake = FakeRedis({'product:1': fresh({'id': 1, 'price': 10.0})})
+
+    with patch('app.core.redis._client', fake):
+        await ProductService.save_products({'1': {'id': 1, 'price': 10.0}})
+        assert 'product:generation' not in fake.store
+
+        await ProductService.save_products({'1': {'id': 1, 'price': 12.0}})
+        assert fake.store['product:generation'] == 1
+
+
+@pytest.mark.asyncio
+async def test_iter_products_yields_in_completion_order():
+    fake = FakeRedis({'product:1': fresh({'id': 1})})
+
+    async def fetch(pid):
+        await asyncio.sleep(0.05 if pid == '2' else 0)
+        return {'id': int(pid)}
+
+    memory_cache.clear()
+    with patch('app.core.redis._client', fake), patch.object(
+        ProductService, 'fetch_from_api', AsyncMock(side_effect=fetch)
+    ):
+        yielded = [
+            item async for item in ProductService.iter_products([1, 2, 3])
+        ]
+
+    assert yielded == [
+        ('1', ({'id': 1}, 'cache_short')),
+        ('3', ({'id': 3}, 'api')),
+        ('2', ({'id': 2}, 'api')),
+    ]
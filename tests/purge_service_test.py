@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.models import WishlistItem, WishlistItemArchive
+from app.services.purge_service import PurgeService
+
+
+def sessions(results):
+    session = AsyncMock()
+    session.execute.side_effect = results
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = session
+    return factory, session
+
+
+def cascaded(product_ids):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = product_ids
+    return result
+
+
+@pytest.mark.asyncio
+async def test_purge_runs_each_step_until_a_short_batch():
+    factory, session = sessions([
+        cascaded(['1', '2']),
+        cascaded([]),
+        MagicMock(rowcount=2),
+        MagicMock(rowcount=1),
+        MagicMock(rowcount=0),
+    ])
+    apply = AsyncMock()
+
+    with patch(
+        'app.services.purge_service.AsyncSessionLocal', factory
+    ), patch(
+        'app.services.purge_service.WishlistPopularity.apply', apply
+    ), patch('app.services.purge_service.asyncio.sleep', AsyncMock()):
+        stats = await PurgeService.purge(30, batch_size=2, delay=0)
+
+    assert stats['cascade']['rows'] == 2
+    assert stats['items']['rows'] == 3
+    assert stats['customers']['rows'] == 0
+    assert 'per_second' in stats['items']
+    apply.assert_awaited_once_with(removed=['1', '2'])
+    assert session.commit.await_count == 5
+
+
+def test_purge_query_archives_locked_batches():
+    cutoff = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    query = PurgeService._purge_query(
+        WishlistItem, WishlistItemArchive, cutoff, 100
+    )
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert 'FOR UPDATE SKIP LOCKED' in sql
+    assert sql.index('DELETE FROM wishlist_item') < sql.index(
+        'INSERT INTO wishlist_item_archive'
+    )
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+import pytest
+from app.core import redis as redis_module
+from app.core.config import settings
+from app.core.redis import batch, create_redis, pool_stats
+from tests.product_service_test import FakeRedis
+
+
+def test_create_redis_bounds_pool_and_timeouts():
+    client = create_redis()
+    pool = client.connection_pool
+    kwargs = pool.connection_kwargs
+
+    assert pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+    assert pool.timeout == settings.REDIS_POOL_TIMEOUT
+    assert kwargs['socket_timeout'] == settings.REDIS_SOCKET_TIMEOUT
+    assert kwargs['socket_connect_timeout'] == settings.REDIS_CONNECT_TIMEOUT
+    assert kwargs['retry'].get_retries() == settings.REDIS_RETRIES
+
+    subscriber = create_redis(socket_timeout=None).connection_pool
+    assert subscriber.connection_kwargs['socket_timeout'] is None
+
+
+def test_no_retry_client_is_separate():
+    with patch.object(redis_module, '_no_retry_client', None):
+        client = redis_module.get_redis(retry=False)
+        assert redis_module.get_redis(retry=False) is client
+
+    pool = client.connection_pool
+    assert client is not redis_module.get_redis()
+    assert pool.connection_kwargs['retry'].get_retries() == 0
+    assert pool.max_connections == settings.REDIS_NO_RETRY_MAX_CONNECTIONS
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_commands_in_one_round_trip():
+    fake = FakeRedis({'a': b'1'})
+    with patch.object(redis_module, '_client', fake):
+        async with batch() as pipe:
+            pipe.set('a', b'2', nx=True)
+            pipe.set('b', b'3')
+
+    assert pipe.results == [None, True]
+    assert fake.store == {'a': b'1', 'b': b'3'}
+
+
+def test_pool_stats_reports_usage():
+    with patch.object(redis_module, '_client', create_redis()):
+        stats = pool_stats()
+
+    assert stats['in_use'] == 0
+    assert stats['max_connections'] == settings.REDIS_MAX_CONNECTIONS
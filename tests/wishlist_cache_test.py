@@ -0,0 +1,275 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+from app.services import wishlist_cache
+from app.core.config import settings
+from app.services.wishlist_cache import (
+    APPLY_CHANGES,
+    INVALIDATE,
+    WishlistCache,
+    member,
+    parse_member,
+)
+from app.services.wishlist_service import WishlistService
+from tests.first_test import Change, FakeResult, Row
+
+CREATED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+ADMIN = {"roles": ["ADMIN"], "email": "admin@x.com"}
+
+
+class Summary(tuple):
+    email = property(lambda self: self[0])
+    count = property(lambda self: self[1])
+    modified = property(lambda self: CREATED)
+
+
+def test_member_order_matches_created_at_then_id():
+    low, high = sorted(uuid.uuid4() for _ in range(2))
+    later = CREATED + timedelta(microseconds=1)
+    members = [
+        member(later, low, "1"),
+        member(CREATED, high, "2"),
+        member(CREATED, low, "3"),
+    ]
+
+    assert sorted(members) == [members[2], members[1], members[0]]
+    assert parse_member(members[0].encode()) == (later, str(low), "1")
+
+
+@pytest.mark.asyncio
+async def test_list_items_served_from_index_skips_database():
+    session = AsyncMock()
+    page = [(CREATED, str(uuid.uuid4()), "10")]
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.read_page",
+        AsyncMock(return_value=("a@b.com", page)),
+    ), patch(
+        "app.services.wishlist_service.ProductService.get_products",
+        AsyncMock(return_value={"10": ({"id": 10}, "memory")}),
+    ):
+        result = await WishlistService.list_items(session, 1, ADMIN, 10, 0)
+
+    assert result["items"] == [{"id": 10}]
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_list_items_rebuilds_index_on_miss():
+    ids = sorted(uuid.uuid4() for _ in range(3))
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[
+            Row(("a@b.com", str(n), CREATED, ids[n])) for n in range(3)
+        ])
+    ]
+    store = AsyncMock(return_value=True)
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.read_page",
+        AsyncMock(return_value=None),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.version",
+        AsyncMock(return_value="7"),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.store", store
+    ), patch(
+        "app.services.wishlist_service.ProductService.get_products",
+        AsyncMock(return_value={"1": ({"id": 1}, "api")}),
+    ):
+        result = await WishlistService.list_items(session, 1, ADMIN, 1, 1)
+
+    # the whole list is stored, guarded by the version read before
+    items = [(CREATED, ids[n], str(n)) for n in range(3)]
+    store.assert_awaited_once_with(1, "a@b.com", items, "7")
+    assert result["items"] == [{"id": 1}]
+    assert result["pagination"]["next_cursor"] is not None
+
+
+@pytest.mark.asyncio
+async def test_too_large_list_is_paged_by_the_database():
+    rows = [
+        Row(("a@b.com", str(n), CREATED, uuid.UUID(int=n))) for n in range(3)
+    ]
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=rows),
+        FakeResult(rows=rows[:2]),
+        FakeResult(rows=rows[:2]),
+    ]
+    read_page = AsyncMock(return_value=None)
+    store_too_large = AsyncMock(return_value=True)
+
+    with patch(
+        "app.services.wishlist_service.settings.WISHLIST_CACHE_MAX_ITEMS", 2
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.read_page", read_page
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.version",
+        AsyncMock(return_value="7"),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.store_too_large",
+        store_too_large,
+    ), patch(
+        "app.services.wishlist_service.ProductService.get_products",
+        AsyncMock(return_value={"0": ({"id": 0}, "api")}),
+    ):
+        await WishlistService.list_items(session, 1, ADMIN, 1, 0)
+        read_page.return_value = wishlist_cache.TOO_LARGE
+        result = await WishlistService.list_items(session, 1, ADMIN, 1, 0)
+
+    # the snapshot is read once; later pages only run the page query
+    store_too_large.assert_awaited_once_with(1, "7")
+    assert session.execute.await_count == 3
+    assert result["items"] == [{"id": 0}]
+
+
+@pytest.mark.asyncio
+async def test_add_product_writes_through():
+    session = AsyncMock()
+    session.execute.side_effect = [
+        FakeResult(rows=[Change(("a@b.com", "add", "10"))])
+    ]
+    apply = AsyncMock()
+    popularity = AsyncMock()
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.begin_write",
+        AsyncMock(return_value="8"),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.apply", apply
+    ), patch(
+        "app.services.wishlist_service.WishlistPopularity.apply", popularity
+    ), patch(
+        "app.services.wishlist_service.ProductService.get_product",
+        AsyncMock(return_value=({"id": 10}, "api")),
+    ):
+        await WishlistService.add_product(session, 1, "10", ADMIN)
+
+    apply.assert_awaited_once_with(
+        1, [(CREATED, uuid.UUID(int=0), "10")], [], CREATED, "8"
+    )
+    popularity.assert_awaited_once_with(["10"], [])
+
+
+@pytest.mark.asyncio
+async def test_write_bumps_the_version_before_its_statement():
+    calls = []
+    session = AsyncMock()
+    redis = MagicMock()
+
+    async def execute(query):
+        calls.append("execute")
+        return FakeResult(rows=[Change(("a@b.com", "remove", "10"))])
+
+    async def begin_write(customer_id):
+        calls.append("begin_write")
+        return "8"
+
+    session.execute.side_effect = execute
+    session.commit.side_effect = lambda: calls.append("commit")
+    redis.eval = AsyncMock(return_value=1)
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.begin_write",
+        begin_write,
+    ), patch("app.core.redis._no_retry_client", redis), patch(
+        "app.services.wishlist_service.WishlistPopularity.apply", AsyncMock()
+    ):
+        await WishlistService.soft_delete(session, 1, "10", ADMIN)
+
+    # a summary rebuilt after the commit was stored at version 8 or later,
+    # so the script drops it instead of counting the removal twice
+    assert calls == ["begin_write", "execute", "commit"]
+    script, _, *args = redis.eval.await_args.args
+    assert script == APPLY_CHANGES
+    assert args[4:6] == [settings.WISHLIST_CACHE_TTL, 0]
+    assert args[7] == "8"
+
+
+@pytest.mark.asyncio
+async def test_summary_is_served_from_counters():
+    session = AsyncMock()
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.read_summary",
+        AsyncMock(return_value=("a@b.com", 3, CREATED)),
+    ), patch(
+        "app.services.wishlist_service.ProductService.get_products"
+    ) as gp:
+        summary = await WishlistService.summary(session, 1, ADMIN)
+
+    assert summary == {"count": 3, "last_modified": CREATED}
+    session.execute.assert_not_awaited()
+    gp.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_summary_is_rebuilt_on_miss():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult(rows=[Summary(("a@b.com", 2))])
+    store_summary = AsyncMock(return_value=True)
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.read_summary",
+        AsyncMock(return_value=None),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.version",
+        AsyncMock(return_value="7"),
+    ), patch(
+        "app.services.wishlist_service.WishlistCache.store_summary",
+        store_summary,
+    ):
+        summary = await WishlistService.summary(session, 1, ADMIN)
+
+        with pytest.raises(HTTPException) as e:
+            await WishlistService.summary(
+                session, 1, {"roles": ["CUSTOMER"], "email": "x@b.com"}
+            )
+
+    assert summary == {"count": 2, "last_modified": CREATED}
+    store_summary.assert_any_await(1, "a@b.com", 2, CREATED, "7")
+    assert e.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_list_etag_follows_versions_and_acl():
+    validators = AsyncMock(return_value=("a@b.com", "5", "9"))
+    customer = {"roles": ["CUSTOMER"], "email": "a@b.com"}
+
+    with patch(
+        "app.services.wishlist_service.WishlistCache.validators", validators
+    ):
+        etag = await WishlistService.list_etag(1, customer, 10, 0)
+        validators.return_value = ("a@b.com", "5", "10")
+        changed = await WishlistService.list_etag(1, customer, 10, 0)
+        other_page = await WishlistService.list_etag(1, customer, 10, 10)
+
+        with pytest.raises(HTTPException) as e:
+            await WishlistService.list_etag(
+                1, {"roles": ["CUSTOMER"], "email": "x@b.com"}, 10, 0
+            )
+
+    assert etag and etag != changed != other_page
+    assert e.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_failed_apply_drops_the_index_until_it_succeeds():
+    redis = MagicMock()
+    redis.eval = AsyncMock(
+        side_effect=[ConnectionError(), ConnectionError(), ConnectionError(), 1]
+    )
+
+    with patch("app.core.redis._client", redis), patch(
+        "app.core.redis._no_retry_client", redis
+    ), patch("app.services.wishlist_cache.asyncio.sleep", AsyncMock()):
+        await WishlistCache.apply(1, [(CREATED, uuid.UUID(int=0), "10")])
+        await asyncio.gather(*wishlist_cache._repair_tasks)
+
+    scripts = [call.args[0] for call in redis.eval.await_args_list]
+    assert scripts[1:] == [INVALIDATE] * 3
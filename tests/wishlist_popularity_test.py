@@ -0,0 +1,38 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from app.services.product_refresher import ProductRefresher
+from app.services.wishlist_popularity import POPULARITY_KEY, WishlistPopularity
+
+
+@pytest.mark.asyncio
+async def test_top_and_counts_read_the_sorted_set():
+    redis = MagicMock()
+    redis.zrevrange = AsyncMock(return_value=[(b'7', 3.0), (b'2', 1.0)])
+    redis.zmscore = AsyncMock(return_value=[3.0, None])
+
+    with patch('app.core.redis._client', redis):
+        top = await WishlistPopularity.top(2)
+        counts = await WishlistPopularity.counts([7, 9])
+
+    assert top == [('7', 3), ('2', 1)]
+    assert counts == {'7': 3, '9': 0}
+    redis.zrevrange.assert_awaited_once_with(
+        POPULARITY_KEY, 0, 1, withscores=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_hot_products_come_from_the_counters():
+    pipe = MagicMock()
+    pipe.__len__.return_value = 3
+    pipe.execute = AsyncMock(return_value=[2, [b'5', b'7'], 1])
+    redis = MagicMock()
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with patch('app.core.redis._client', redis), patch.object(
+        WishlistPopularity, 'top', AsyncMock(return_value=[('7', 4)])
+    ):
+        hot = await ProductRefresher.hot_product_ids(10)
+
+    assert hot == ['7', '5']